@@ -27,42 +27,49 @@ def main():
     if not src.exists():
         raise FileNotFoundError(f"No existe el archivo origen: {src}")
 
-    wb = load_workbook(src)
+    # read_only: las filas se leen en streaming, sin cargar el DOM completo del libro
+    wb = load_workbook(src, read_only=True, data_only=True)
     ws = wb[args.sheet] if args.sheet else wb[wb.sheetnames[0]]
+    # En read_only openpyxl confía en el <dimension> del XML, que algunos exportadores
+    # dejan desactualizado y cortaría filas: se ignora y se lee hasta el final del stream.
+    ws.reset_dimensions()
 
-    # Header
-    header_row = next(ws.iter_rows(min_row=1, max_row=1))
-    hdr = [c.value for c in header_row]
+    # Header (en read_only las celdas son perezosas: se leen los valores directamente)
+    (header_row,) = ws.iter_rows(min_row=1, max_row=1, values_only=True)
+    hdr = list(header_row)
 
     if col_name not in hdr:
         raise ValueError(f"No se encontró la columna '{col_name}' en el Excel. Columnas: {hdr}")
 
     ix = hdr.index(col_name)  # 0-based index
 
-    out = Workbook()
-    ows = out.active
-    ows.title = ws.title
+    # write_only: las filas se escriben en streaming al guardar
+    out = Workbook(write_only=True)
+    ows = out.create_sheet(ws.title)
     ows.append(hdr)
 
     kept = 0
     scanned = 0
 
     for row in ws.iter_rows(min_row=2, values_only=True):
-        if not row or not any(row):
-            continue
-
-        scanned += 1
-        v = row[ix]
+        # Filas vacías (o cortas) no tienen valor en la columna de versión.
+        # "Scanned rows" cuenta solo filas no vacías: any() se evalúa solo sin versión.
+        v = row[ix] if ix < len(row) else None
         if v is None:
+            if any(row):
+                scanned += 1
             continue
+        scanned += 1
 
         if str(v).strip().lower() == version:
-            ows.append(list(row))
+            # write_only acepta la tupla tal cual
+            ows.append(row)
             kept += 1
 
     # Crear carpeta destino si no existe
     dst.parent.mkdir(parents=True, exist_ok=True)
     out.save(dst)
+    wb.close()
 
     print(f"OK -> {dst}")
     print(f"Sheet: {ws.title}")
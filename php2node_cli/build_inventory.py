@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import argparse
+import mmap
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 
+try:  # xlsxwriter es opcional: escribe más rápido; si no está se usa openpyxl en modo write_only
+    import xlsxwriter  # type: ignore
+except Exception:
+    xlsxwriter = None
+
 
 HTTP_SUFFIX = {
     "_get": "GET",
@@ -16,9 +25,11 @@ HTTP_SUFFIX = {
     "_put": "PUT",
     "_delete": "DELETE",
 }
+# Ningún sufijo es sufijo de otro: basta el primero que coincida
+_SUFFIXES = tuple(HTTP_SUFFIX.keys())
 
 
-@dataclass
+@dataclass(slots=True)
 class EndpointRow:
     app: str  # api|portal
     version: str  # v1|v2|unknown
@@ -75,11 +86,8 @@ def find_methods_rest(text: str) -> List[str]:
     candidates = re.findall(r"\bfunction\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(", text)
     out: List[str] = []
     for name in candidates:
-        lname = name.lower()
-        for suffix in HTTP_SUFFIX.keys():
-            if lname.endswith(suffix):
-                out.append(name)
-                break
+        if name.lower().endswith(_SUFFIXES):
+            out.append(name)
     return out
 
 
@@ -93,6 +101,78 @@ def detect_notes(text: str) -> str:
     return ",".join(notes)
 
 
+# Una sola pasada por controller: class / function / "route" (este último sin distinguir mayúsculas).
+# Los nombres se capturan con lookahead para no consumirlos: así un identificador "route"
+# también cuenta para la heurística, igual que con las búsquedas por separado.
+# Patrón en bytes: corre directo sobre el mmap del archivo, sin decodificarlo.
+# En bytes \b solo conoce ASCII; los bytes >= 0x80 (parte de caracteres UTF-8 o latin-1)
+# se tratan como caracteres de identificador, igual que el lexer de PHP. La excepción es
+# el BOM UTF-8 al inicio del archivo: decodificado es "\ufeff", que no es de palabra, y \b
+# sobre str sí matcheaba justo después. Se admite en el lookbehind (finditer con pos=3 no
+# alcanza: el lookbehind igual ve los bytes anteriores a pos).
+_NOT_AFTER_IDENT = rb"(?:(?<=\A\xef\xbb\xbf)|(?<![A-Za-z0-9_\x80-\xff]))"
+_NOT_BEFORE_IDENT = rb"(?![A-Za-z0-9_\x80-\xff])"
+_RX_CONTROLLER_SCAN = re.compile(
+    _NOT_AFTER_IDENT + rb"class\s+(?=([A-Za-z_][A-Za-z0-9_]*)" + _NOT_BEFORE_IDENT + rb")"
+    rb"|" + _NOT_AFTER_IDENT + rb"function\s+(?=([A-Za-z_][A-Za-z0-9_]*)\s*\()"
+    rb"|" + _NOT_AFTER_IDENT + rb"(?i:route)" + _NOT_BEFORE_IDENT
+)
+
+
+def scan_controller_source(buf) -> Tuple[Optional[str], List[str], str]:
+    """
+    Equivale a extract_class_name + find_methods_rest + detect_notes en un solo recorrido.
+    buf es el contenido en bytes (bytes o mmap); solo se decodifican los identificadores capturados.
+    Devuelve (class_name, métodos REST, notes).
+    """
+    class_name: Optional[str] = None
+    methods: List[str] = []
+    has_remap = False
+    may_route = False
+
+    for mo in _RX_CONTROLLER_SCAN.finditer(buf):
+        cls, fn = mo.group(1), mo.group(2)
+        if cls is not None:
+            if class_name is None:
+                class_name = cls.decode("ascii")
+        elif fn is not None:
+            fn = fn.decode("ascii")
+            if fn == "_remap":
+                has_remap = True
+            if fn.lower().endswith(_SUFFIXES):
+                methods.append(fn)
+        else:
+            may_route = True
+
+    notes: List[str] = []
+    if has_remap:
+        notes.append("HAS__REMAP")
+    if may_route:
+        notes.append("MAY_HAVE_CUSTOM_ROUTING")
+    return class_name, methods, ",".join(notes)
+
+
+def _walk_php(root: str) -> Iterator[str]:
+    """
+    Recorre root con os.scandir y devuelve las rutas de los *.php.
+    El tipo de cada entrada sale del dirent: no hace stat por archivo como rglob.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                # normcase: en Windows la extensión no distingue mayúsculas (igual que rglob)
+                elif os.path.normcase(e.name).endswith(".php") and e.is_file():
+                    yield e.path
+
+
 def iter_controller_files(repo_root: Path) -> Iterable[Path]:
     """
     Busca controllers en:
@@ -107,71 +187,86 @@ def iter_controller_files(repo_root: Path) -> Iterable[Path]:
     for base in bases:
         if not base.exists():
             continue
-        for p in base.rglob("*.php"):
+        for p in _walk_php(str(base)):
             # evita rutas típicas que no son controllers (si aplica)
-            yield p
+            yield Path(p)
 
 
-def build_rows(repo_root: Path) -> List[EndpointRow]:
+def _scan_controller(args: Tuple[Path, Path]) -> List[EndpointRow]:
+    """
+    Escanea un controller y devuelve sus filas de endpoints.
+    Es función de módulo para poder enviarse a los workers del ProcessPoolExecutor.
+    """
+    controller_file, repo_root = args
     rows: List[EndpointRow] = []
 
-    for controller_file in iter_controller_files(repo_root):
-        try:
-            raw = controller_file.read_bytes()
-        except Exception:
+    # mmap: el regex corre sobre las páginas del archivo, sin copiarlo ni decodificarlo
+    try:
+        with open(controller_file, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return rows
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                class_name, methods, notes = scan_controller_source(mm)
+    except Exception:
+        return rows
+
+    app, rel = detect_app_and_rel(controller_file, repo_root)
+    # intern: los mismos valores se repiten en todas las filas del controller
+    version = sys.intern(detect_version_from_path(rel))
+    controller = sys.intern(controller_name_from_file(controller_file))
+    controller_path = str(controller_file)
+    ver_prefix = f"{version}/" if version != "unknown" else ""
+
+    for method in methods:
+        m_lower = method.lower()
+        suffix = next((suf for suf in _SUFFIXES if m_lower.endswith(suf)), None)
+        if suffix is None:
+            continue
+        http_method = HTTP_SUFFIX[suffix]
+        method_base = method[: -len(suffix)]
+        if not method_base:
             continue
 
-        # decode robusto
-        text = None
-        for enc in ("utf-8", "utf-8-sig", "cp1252", "latin-1"):
-            try:
-                text = raw.decode(enc)
-                break
-            except UnicodeDecodeError:
-                continue
-        if text is None:
-            text = raw.decode("latin-1", errors="replace")
-
-        app, rel = detect_app_and_rel(controller_file, repo_root)
-        version = detect_version_from_path(rel)
-        controller = controller_name_from_file(controller_file)
-        class_name = extract_class_name(text)
-        notes = detect_notes(text)
-
-        methods = find_methods_rest(text)
-        for method in methods:
-            m_lower = method.lower()
-            http_method = None
-            method_base = None
-            for suffix, hm in HTTP_SUFFIX.items():
-                if m_lower.endswith(suffix):
-                    http_method = hm
-                    method_base = method[: -len(suffix)]
-                    break
-            if not http_method or not method_base:
-                continue
-
-            ep = f"{controller}/{method_base}"
-            if version != "unknown":
-                epv = f"{version}/{ep}"
-            else:
-                epv = ep
-
-            rows.append(
-                EndpointRow(
-                    app=app,
-                    version=version,
-                    controller=controller,
-                    http_method=http_method,
-                    method=method,
-                    method_base=method_base,
-                    endpoint_path=ep,
-                    endpoint_path_with_version=epv,
-                    controller_file=str(controller_file),
-                    class_name=class_name,
-                    notes=notes,
-                )
+        ep = f"{controller}/{method_base}"
+        epv = ver_prefix + ep if ver_prefix else ep
+
+        rows.append(
+            EndpointRow(
+                app=app,
+                version=version,
+                controller=controller,
+                http_method=http_method,
+                method=method,
+                method_base=method_base,
+                endpoint_path=ep,
+                endpoint_path_with_version=epv,
+                controller_file=controller_path,
+                class_name=class_name,
+                notes=notes,
             )
+        )
+
+    return rows
+
+
+# Por debajo de este número de archivos el arranque del pool cuesta más que el escaneo
+_PARALLEL_MIN_FILES = 32
+
+
+def build_rows(repo_root: Path) -> List[EndpointRow]:
+    rows: List[EndpointRow] = []
+
+    files = list(iter_controller_files(repo_root))
+    jobs = [(f, repo_root) for f in files]
+
+    # Lectura + regex por archivo es independiente: se reparte entre procesos
+    if len(files) < _PARALLEL_MIN_FILES:
+        for job in jobs:
+            rows.extend(_scan_controller(job))
+    else:
+        with ProcessPoolExecutor() as ex:
+            for rows_part in ex.map(_scan_controller, jobs, chunksize=16):
+                rows.extend(rows_part)
 
     # orden estable
     rows.sort(key=lambda r: (r.version, r.app, r.controller, r.http_method, r.method_base))
@@ -179,10 +274,6 @@ def build_rows(repo_root: Path) -> List[EndpointRow]:
 
 
 def write_xlsx(rows: List[EndpointRow], out_path: Path, sheet_name: str = "EndPoints") -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = sheet_name
-
     headers = [
         "Version",
         "App",
@@ -196,36 +287,72 @@ def write_xlsx(rows: List[EndpointRow], out_path: Path, sheet_name: str = "EndPo
         "ClassName",
         "Notes",
     ]
-    ws.append(headers)
 
+    # autosize simple, calculado al armar cada fila (sin segunda pasada sobre la hoja)
+    widths = [max(10, len(h)) for h in headers]
+    table: List[List[str]] = []
     for r in rows:
-        ws.append(
-            [
-                r.version,
-                r.app,
-                r.controller,
-                r.http_method,
-                r.method,
-                r.method_base,
-                r.endpoint_path,
-                r.endpoint_path_with_version,
-                r.controller_file,
-                r.class_name or "",
-                r.notes,
-            ]
-        )
-
-    # autosize simple
-    for col_idx, _ in enumerate(headers, start=1):
-        letter = get_column_letter(col_idx)
-        max_len = 10
-        for cell in ws[letter]:
-            if cell.value is None:
-                continue
-            max_len = max(max_len, len(str(cell.value)))
-        ws.column_dimensions[letter].width = min(max_len + 2, 80)
+        values = [
+            r.version,
+            r.app,
+            r.controller,
+            r.http_method,
+            r.method,
+            r.method_base,
+            r.endpoint_path,
+            r.endpoint_path_with_version,
+            r.controller_file,
+            r.class_name or "",
+            r.notes,
+        ]
+        for i, v in enumerate(values):
+            n = len(str(v))
+            if n > widths[i]:
+                widths[i] = n
+        table.append(values)
+    widths = [min(w + 2, 80) for w in widths]
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    if xlsxwriter is not None:
+        _save_xlsxwriter(out_path, sheet_name, headers, table, widths)
+    else:
+        _save_openpyxl(out_path, sheet_name, headers, table, widths)
+
+
+def _save_xlsxwriter(
+    out_path: Path, sheet_name: str, headers: List[str], table: List[List[str]], widths: List[int]
+) -> None:
+    # constant_memory: cada fila se vuelca a disco al escribirse, sin objetos de celda.
+    # Sin conversiones automáticas: "=..." no es fórmula ni "http(s)://"/"mailto:" hipervínculo
+    wb = xlsxwriter.Workbook(
+        str(out_path),
+        {"constant_memory": True, "strings_to_formulas": False, "strings_to_urls": False},
+    )
+    ws = wb.add_worksheet(sheet_name)
+    for i, w in enumerate(widths):
+        ws.set_column(i, i, w)
+    ws.write_row(0, 0, headers)
+    for row_idx, values in enumerate(table, start=1):
+        ws.write_row(row_idx, 0, values)
+    wb.close()
+
+
+def _save_openpyxl(
+    out_path: Path, sheet_name: str, headers: List[str], table: List[List[str]], widths: List[int]
+) -> None:
+    # write_only: las filas se escriben en streaming al zip, sin DOM de celdas
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+
+    # En write_only los anchos se serializan con el encabezado de la hoja:
+    # deben fijarse antes del primer append.
+    for i, w in enumerate(widths):
+        ws.column_dimensions[get_column_letter(i + 1)].width = w
+
+    ws.append(headers)
+    for values in table:
+        ws.append(values)
+
     wb.save(out_path)
 
 
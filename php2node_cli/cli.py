@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import argparse
+import csv
 import json
 import logging
 import os
 import re
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from .extractor import analyze_php_method, detect_dependencies, extract_method_block
-from .inventory import Inventory
+from .inventory import Inventory, InventoryRow
 from .report import build_report_md, build_unresolved_md, write_report
 from .resolver import resolve_controller
 from .scaffold_nest import generate_nest_scaffold
@@ -23,11 +25,23 @@ from .utils import (
     norm_version,
     safe_slug,
     write_text,
+    VALID_HTTP,
 )
 
+try:  # orjson es opcional: serializa en C; si no está se usa json de la stdlib
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
 LOG = logging.getLogger("php2node")
 
 
+def _dumps_json(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
 def setup_logging(verbosity: int) -> None:
     level = logging.INFO
     if verbosity >= 2:
@@ -109,8 +123,15 @@ def parse_args() -> argparse.Namespace:
         help="Search scope. Also via PHP2NODE_APP in .env",
     )
 
-    p.add_argument("--http-method", required=True, help="GET|POST|PUT|DELETE")
-    p.add_argument("--endpoint-path", required=True, help='Example: "bank_account/dacustomer_bank" (no leading slash)')
+    p.add_argument("--http-method", required=False, help="GET|POST|PUT|DELETE")
+    p.add_argument("--endpoint-path", required=False, help='Example: "bank_account/dacustomer_bank" (no leading slash)')
+    p.add_argument(
+        "--endpoints-file",
+        required=False,
+        default=None,
+        help="Batch mode: CSV with http_method,endpoint_path[,version] per line. "
+             "Replaces --http-method/--endpoint-path and processes endpoints in parallel.",
+    )
     p.add_argument("--version", required=False, help="v1|v2 (optional). If omitted, inferred from inventory.")
     p.add_argument("--clean-out", action="store_true", help="Delete output folder before writing new results.")
     p.add_argument("-v", "--verbose", action="count", default=0, help="Increase log verbosity (-v, -vv)")
@@ -278,32 +299,26 @@ def _resolve_flujo(controller_name: str, domain_map: dict[str, dict], flujo_over
     return "A"
 
 
-def main() -> int:
-    args = parse_args()
-    setup_logging(args.verbose)
-
-    repo_root_str = _require_arg(args.repo_root, "--repo-root", "PHP2NODE_REPO_ROOT")
-
-    http_method = norm_http(args.http_method)
-    endpoint_path = norm_endpoint_path(args.endpoint_path)
-    version = norm_version(args.version) if args.version else None
-    app_choice = args.app
+def _write_unresolved(out_root: Path, subdir: str, title: str, details: list[str], file_name: str) -> None:
+    unresolved_dir = out_root / "unresolved" / subdir
+    ensure_dir(unresolved_dir)
+    write_report(unresolved_dir / file_name, build_unresolved_md(title, details))
 
-    inv_path_str = _resolve_inventory_path(args.inventory_xlsx, version)
-
-    repo_root = Path(repo_root_str).expanduser().resolve()
-    inv_path = Path(inv_path_str).expanduser().resolve()
-    out_root = Path(args.out).expanduser().resolve()
-
-    if args.clean_out and out_root.exists():
-        LOG.info("Cleaning output folder: %s", out_root)
-        shutil.rmtree(out_root)
-
-    ensure_dir(out_root)
-
-    LOG.info("Stage 1: Load inventory")
-    inv = Inventory.load(inv_path, sheet_name=args.sheet)
 
+def _match_endpoint(
+    inv: Inventory,
+    inv_path: Path,
+    sheet: str,
+    out_root: Path,
+    http_method: str,
+    endpoint_path: str,
+    version: str | None,
+    unresolved_name: str = "unresolved.md",
+) -> InventoryRow | None:
+    """
+    Stages 1.1-2: infiere la versión (si no viene) y busca el endpoint en el inventario.
+    Si no se resuelve escribe el reporte en out/unresolved y retorna None.
+    """
     if not version:
         LOG.info("Stage 1.1: Infer version (not provided)")
         versions = inv.infer_version(http_method=http_method, endpoint_path=endpoint_path)
@@ -313,7 +328,7 @@ def main() -> int:
             details = [
                 f"Endpoint not found in inventory for {http_method} {endpoint_path}",
                 f"Inventory file: {inv_path}",
-                f"Sheet: {args.sheet}",
+                f"Sheet: {sheet}",
             ]
             if suggestions:
                 details.append("Suggestions (partial matches):")
@@ -321,22 +336,18 @@ def main() -> int:
                     details.append(
                         f"  - {s.http_method} {s.version} {s.endpoint_path} | Controller={s.controller} Method={s.method}"
                     )
-            unresolved_dir = out_root / "unresolved" / "unknown"
-            ensure_dir(unresolved_dir)
-            write_report(unresolved_dir / "unresolved.md", build_unresolved_md("Unresolved Endpoint", details))
+            _write_unresolved(out_root, "unknown", "Unresolved Endpoint", details, unresolved_name)
             LOG.error("Unresolved: endpoint not found in inventory")
-            return 2
+            return None
 
         if len(versions) > 1:
             details = [
                 f"Ambiguous version for {http_method} {endpoint_path}. Versions found: {versions}",
                 "Re-run with --version v1 or --version v2.",
             ]
-            unresolved_dir = out_root / "unresolved" / "ambiguous"
-            ensure_dir(unresolved_dir)
-            write_report(unresolved_dir / "unresolved.md", build_unresolved_md("Ambiguous Version", details))
+            _write_unresolved(out_root, "ambiguous", "Ambiguous Version", details, unresolved_name)
             LOG.error("Unresolved: ambiguous version in inventory")
-            return 2
+            return None
 
         version = versions[0]
         LOG.info("Inferred version: %s", version)
@@ -348,7 +359,7 @@ def main() -> int:
         details = [
             f"No exact match in inventory for {http_method} {version} {endpoint_path}",
             f"Inventory file: {inv_path}",
-            f"Sheet: {args.sheet}",
+            f"Sheet: {sheet}",
         ]
         if suggestions:
             details.append("Suggestions (partial matches):")
@@ -356,11 +367,9 @@ def main() -> int:
                 details.append(
                     f"  - {s.http_method} {s.version} {s.endpoint_path} | Controller={s.controller} Method={s.method}"
                 )
-        unresolved_dir = out_root / "unresolved" / version
-        ensure_dir(unresolved_dir)
-        write_report(unresolved_dir / "unresolved.md", build_unresolved_md("Unresolved Endpoint", details))
+        _write_unresolved(out_root, version, "Unresolved Endpoint", details, unresolved_name)
         LOG.error("Unresolved: no exact inventory match")
-        return 2
+        return None
 
     if len(exact) > 1:
         details = [
@@ -369,13 +378,32 @@ def main() -> int:
         ]
         for r in exact:
             details.append(f"  - Controller={r.controller} Method={r.method} MethodBase={r.method_base}")
-        unresolved_dir = out_root / "unresolved" / version
-        ensure_dir(unresolved_dir)
-        write_report(unresolved_dir / "unresolved.md", build_unresolved_md("Ambiguous Inventory Match", details))
+        _write_unresolved(out_root, version, "Ambiguous Inventory Match", details, unresolved_name)
         LOG.error("Unresolved: multiple inventory matches")
-        return 2
+        return None
 
-    row = exact[0]
+    return exact[0]
+
+
+def process_endpoint(
+    *,
+    repo_root: Path,
+    out_root: Path,
+    row: InventoryRow,
+    http_method: str,
+    endpoint_path: str,
+    app_choice: str,
+    ms_name: str | None,
+    ms_new: bool,
+    ms_port: int | None,
+    akisi_root: str | None,
+    flujo: str | None,
+    unresolved_name: str = "unresolved.md",
+) -> int:
+    """
+    Stages 3-7 para un endpoint ya resuelto en el inventario.
+    Solo recibe valores serializables para poder correr en un worker del modo batch.
+    """
     method_name = row.method
 
     LOG.info("Stage 3: Resolve controller file in repo")
@@ -392,9 +420,7 @@ def main() -> int:
         details += [f"  - {p}" for p in resolved.probe.tried[:30]]
         if len(resolved.probe.tried) > 30:
             details.append("  - (more paths omitted)")
-        unresolved_dir = out_root / "unresolved" / row.version
-        ensure_dir(unresolved_dir)
-        write_report(unresolved_dir / "unresolved.md", build_unresolved_md("Controller Not Found", details))
+        _write_unresolved(out_root, row.version, "Controller Not Found", details, unresolved_name)
         LOG.error("Unresolved: controller file not found")
         return 2
 
@@ -407,9 +433,7 @@ def main() -> int:
             f"Method expected: {method_name}",
             "Notes:",
         ] + [f"  - {n}" for n in ext.notes]
-        unresolved_dir = out_root / "unresolved" / row.version
-        ensure_dir(unresolved_dir)
-        write_report(unresolved_dir / "unresolved.md", build_unresolved_md("Method Not Found", details))
+        _write_unresolved(out_root, row.version, "Method Not Found", details, unresolved_name)
         LOG.error("Unresolved: method not extracted")
         return 2
 
@@ -425,7 +449,7 @@ def main() -> int:
     write_text(php_dir / "method.php", ext.extracted)
 
     analysis = analyze_php_method(ext.extracted)
-    write_text(php_dir / "analysis.json", json.dumps(analysis, indent=2, ensure_ascii=False))
+    write_text(php_dir / "analysis.json", _dumps_json(analysis))
 
     domain_map = _load_domain_map()
     domain_name = _resolve_domain_name(row.controller, domain_map)
@@ -452,16 +476,13 @@ def main() -> int:
     )
 
     LOG.info("Stage 6b: Generate Akisi scaffold (patrón akisi_backend_nestjs)")
-    ms_name = args.ms_name if args.ms_name else domain_name
-    es_nuevo = args.ms_new
+    ms_name = ms_name if ms_name else domain_name
+    es_nuevo = ms_new
 
-    akisi_root = getattr(args, "akisi_root", None)
-    if args.ms_port:
-        ms_port = args.ms_port
-    else:
+    if not ms_port:
         ms_port = _detectar_puerto_disponible(akisi_root, fallback=3003)
 
-    flujo = _resolve_flujo(row.controller, domain_map, getattr(args, "flujo", None))
+    flujo = _resolve_flujo(row.controller, domain_map, flujo)
 
     generate_akisi_scaffold(
         out_base_dir=base_dir,
@@ -538,5 +559,166 @@ def main() -> int:
     return 0
 
 
+def _process_endpoint_job(job: dict) -> int:
+    # Punto de entrada de los workers: ProcessPoolExecutor.map pasa un solo argumento
+    return process_endpoint(**job)
+
+
+def _read_endpoints_file(path: Path) -> list[tuple[str, str, str | None]]:
+    """
+    Lee el CSV del modo batch: http_method,endpoint_path[,version]
+    Ignora líneas vacías, comentarios (#) y un encabezado opcional (solo la primera
+    línea con datos). Devuelve los valores ya normalizados; un método HTTP inválido
+    corta la lectura con el número de línea.
+    """
+    out: list[tuple[str, str, str | None]] = []
+    first = True
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        for i, rec in enumerate(csv.reader(fh), start=1):
+            rec = [c.strip() for c in rec]
+            if not rec or not any(rec) or rec[0].startswith("#"):
+                continue
+            is_first, first = first, False
+            if len(rec) < 2:
+                raise SystemExit(f"{path}:{i}: expected http_method,endpoint_path[,version]")
+            try:
+                http_method = norm_http(rec[0])
+            except ValueError:
+                if is_first:
+                    LOG.info("%s:%d: encabezado ignorado: %s", path, i, ",".join(rec))
+                    continue
+                raise SystemExit(
+                    f"{path}:{i}: invalid http_method '{rec[0]}'. Must be one of {sorted(VALID_HTTP)}"
+                ) from None
+            version = norm_version(rec[2]) if len(rec) > 2 and rec[2] else None
+            out.append((http_method, norm_endpoint_path(rec[1]), version))
+    return out
+
+
+def _run_batch(args: argparse.Namespace, repo_root: Path, out_root: Path) -> int:
+    """
+    Modo batch (--endpoints-file): los inventarios se cargan una vez en este proceso
+    y los stages 3-7 de cada endpoint corren en paralelo en un ProcessPoolExecutor.
+    """
+    endpoints_file = Path(args.endpoints_file).expanduser().resolve()
+    if not endpoints_file.exists():
+        raise SystemExit(f"Endpoints file not found: {endpoints_file}")
+
+    entries = _read_endpoints_file(endpoints_file)
+    default_version = norm_version(args.version) if args.version else None
+
+    inventories: dict[Path, Inventory] = {}
+    jobs: list[dict] = []
+    unresolved = 0
+    # (método, path, versión) ya vistos: dos jobs iguales escribirían el mismo resolved/<key> en paralelo
+    seen: set[tuple[str, str, str | None]] = set()
+
+    for http_method, endpoint_path, version in entries:
+        version = version or default_version
+        if (http_method, endpoint_path, version) in seen:
+            LOG.warning("Endpoint duplicado en %s, se omite: %s %s (%s)", endpoints_file, http_method, endpoint_path, version)
+            continue
+        seen.add((http_method, endpoint_path, version))
+
+        inv_path = Path(_resolve_inventory_path(args.inventory_xlsx, version)).expanduser().resolve()
+        inv = inventories.get(inv_path)
+        if inv is None:
+            LOG.info("Stage 1: Load inventory (%s)", inv_path)
+            inv = Inventory.load(inv_path, sheet_name=args.sheet)
+            inventories[inv_path] = inv
+
+        # En batch cada endpoint escribe su propio unresolved para no pisarse
+        unresolved_name = f"{endpoint_key(version or 'unknown', http_method, endpoint_path)}.md"
+        row = _match_endpoint(inv, inv_path, args.sheet, out_root, http_method, endpoint_path, version, unresolved_name)
+        if row is None:
+            unresolved += 1
+            continue
+
+        jobs.append(
+            {
+                "repo_root": repo_root,
+                "out_root": out_root,
+                "row": row,
+                "http_method": http_method,
+                "endpoint_path": endpoint_path,
+                "app_choice": args.app,
+                "ms_name": args.ms_name,
+                "ms_new": args.ms_new,
+                "ms_port": args.ms_port,
+                "akisi_root": getattr(args, "akisi_root", None),
+                "flujo": getattr(args, "flujo", None),
+                "unresolved_name": unresolved_name,
+            }
+        )
+
+    LOG.info("Stages 3-7: %d endpoints en paralelo", len(jobs))
+    failed = 0
+    if jobs:
+        with ProcessPoolExecutor(initializer=setup_logging, initargs=(args.verbose,)) as ex:
+            for rc in ex.map(_process_endpoint_job, jobs):
+                if rc != 0:
+                    failed += 1
+
+    LOG.info(
+        "Batch done. Endpoints: %d | OK: %d | Unresolved: %d | Output: %s",
+        len(seen),
+        len(jobs) - failed,
+        unresolved + failed,
+        out_root,
+    )
+    return 0 if unresolved + failed == 0 else 2
+
+
+def main() -> int:
+    args = parse_args()
+    setup_logging(args.verbose)
+
+    repo_root_str = _require_arg(args.repo_root, "--repo-root", "PHP2NODE_REPO_ROOT")
+    repo_root = Path(repo_root_str).expanduser().resolve()
+    out_root = Path(args.out).expanduser().resolve()
+
+    if not args.endpoints_file and not (args.http_method and args.endpoint_path):
+        raise SystemExit("Missing --http-method and --endpoint-path (or --endpoints-file for batch mode)")
+
+    if not args.endpoints_file:
+        http_method = norm_http(args.http_method)
+        endpoint_path = norm_endpoint_path(args.endpoint_path)
+        version = norm_version(args.version) if args.version else None
+        app_choice = args.app
+
+        inv_path_str = _resolve_inventory_path(args.inventory_xlsx, version)
+        inv_path = Path(inv_path_str).expanduser().resolve()
+
+    if args.clean_out and out_root.exists():
+        LOG.info("Cleaning output folder: %s", out_root)
+        shutil.rmtree(out_root)
+
+    ensure_dir(out_root)
+
+    if args.endpoints_file:
+        return _run_batch(args, repo_root, out_root)
+
+    LOG.info("Stage 1: Load inventory")
+    inv = Inventory.load(inv_path, sheet_name=args.sheet)
+
+    row = _match_endpoint(inv, inv_path, args.sheet, out_root, http_method, endpoint_path, version)
+    if row is None:
+        return 2
+
+    return process_endpoint(
+        repo_root=repo_root,
+        out_root=out_root,
+        row=row,
+        http_method=http_method,
+        endpoint_path=endpoint_path,
+        app_choice=app_choice,
+        ms_name=args.ms_name,
+        ms_new=args.ms_new,
+        ms_port=args.ms_port,
+        akisi_root=getattr(args, "akisi_root", None),
+        flujo=getattr(args, "flujo", None),
+    )
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
\ No newline at end of file
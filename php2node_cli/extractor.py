@@ -3,9 +3,34 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
-from .utils import read_text
+from .utils import read_text_cached
+
+try:  # numba es opcional: si no está instalado se usa el escáner en Python puro
+    from numba import njit  # type: ignore
+    from numba import types as nb_types  # type: ignore
+except Exception:
+    njit = None
+
+
+# Patrones precompilados (se reutilizan en cada endpoint analizado).
+# Sin re.IGNORECASE global: las palabras clave de PHP (function, class, switch, case, default,
+# self) se escriben en minúsculas por convención y $this/propiedades distinguen mayúsculas.
+# Así el motor puede usar el prefijo literal para saltar texto. Solo los nombres de
+# métodos PHP (que no distinguen mayúsculas) van con (?i:...) acotado.
+_RX_LOAD_DEPS = re.compile(r"\$this->load->(?i:(model|helper|library))\(\s*['\"]([^'\"]+)['\"]\s*\)")
+_RX_INPUT_CALLS = re.compile(r"\$this->(?i:(get|post|put|delete))\(")
+
+_RX_INPUTS = re.compile(r"\$this->(get|post|put|delete)\(\s*['\"]([^'\"]+)['\"]\s*\)")
+_RX_MODEL_LOAD = re.compile(r"\$this->load->model\(\s*['\"]([^'\"]+)['\"]\s*\)")
+_RX_MODEL_CALL = re.compile(r"\$this->([A-Za-z_][A-Za-z0-9_]*)->([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+_RX_REST_CODE = re.compile(r"REST_Controller::HTTP_([A-Z_]+)")
+_RX_SWITCH = re.compile(r"switch\s*\(\s*\$([A-Za-z_][A-Za-z0-9_]*)\s*\)")
+_RX_CASE = re.compile(r"case\s+['\"]?([^'\"]+)['\"]?\s*:")
+_RX_DEFAULT = re.compile(r"\bdefault\s*:")
+_RX_SELF_CONST = re.compile(r"self::([A-Za-z_][A-Za-z0-9_]*)")
+_RX_MESSAGE = re.compile(r"'message'\s*=>\s*'([^']+)'")
 
 
 @dataclass
@@ -114,17 +139,152 @@ def _scan_braces_php(source: str, start_idx: int) -> Optional[int]:
     return None
 
 
+# Bytes relevantes para el escáner compilado (UTF-8 nunca los usa dentro de un carácter multibyte)
+_B_LBRACE = ord("{")
+_B_RBRACE = ord("}")
+_B_SQUOTE = ord("'")
+_B_DQUOTE = ord('"')
+_B_BSLASH = ord("\\")
+_B_SLASH = ord("/")
+_B_STAR = ord("*")
+_B_HASH = ord("#")
+_B_NL = ord("\n")
+
+
+def _scan_braces_php_bytes(src: bytes, start_idx: int) -> int:
+    """
+    Misma máquina de estados que _scan_braces_php, pero sobre bytes UTF-8 para compilarse con numba.
+    Retorna el offset (en bytes) de la llave de cierre, o -1 si no se encuentra.
+    """
+    i = start_idx
+    n = len(src)
+
+    while i < n and src[i] != _B_LBRACE:
+        i += 1
+    if i >= n:
+        return -1
+
+    brace = 0
+    in_squote = False
+    in_dquote = False
+    in_line_comment = False
+    in_block_comment = False
+    escape = False
+
+    while i < n:
+        ch = src[i]
+        nxt = src[i + 1] if i + 1 < n else -1
+
+        if in_line_comment:
+            if ch == _B_NL:
+                in_line_comment = False
+            i += 1
+            continue
+
+        if in_block_comment:
+            if ch == _B_STAR and nxt == _B_SLASH:
+                in_block_comment = False
+                i += 2
+                continue
+            i += 1
+            continue
+
+        if in_squote:
+            if escape:
+                escape = False
+            elif ch == _B_BSLASH:
+                escape = True
+            elif ch == _B_SQUOTE:
+                in_squote = False
+            i += 1
+            continue
+
+        if in_dquote:
+            if escape:
+                escape = False
+            elif ch == _B_BSLASH:
+                escape = True
+            elif ch == _B_DQUOTE:
+                in_dquote = False
+            i += 1
+            continue
+
+        if ch == _B_SLASH and nxt == _B_SLASH:
+            in_line_comment = True
+            i += 2
+            continue
+        if ch == _B_SLASH and nxt == _B_STAR:
+            in_block_comment = True
+            i += 2
+            continue
+        if ch == _B_HASH:
+            in_line_comment = True
+            i += 1
+            continue
+
+        if ch == _B_SQUOTE:
+            in_squote = True
+            i += 1
+            continue
+        if ch == _B_DQUOTE:
+            in_dquote = True
+            i += 1
+            continue
+
+        if ch == _B_LBRACE:
+            brace += 1
+        elif ch == _B_RBRACE:
+            brace -= 1
+            if brace == 0:
+                return i
+
+        i += 1
+
+    return -1
+
+
+if njit is not None:
+    # Firma explícita: se compila al importar y, con cache=True, las siguientes ejecuciones
+    # cargan el binario desde __pycache__ en vez de recompilar (ver php2node_cli.warmup).
+    _scan_braces_php_nb = njit(
+        nb_types.int64(nb_types.Bytes(nb_types.uint8, 1, "C", readonly=True), nb_types.int64),
+        cache=True,
+    )(_scan_braces_php_bytes)
+else:
+    _scan_braces_php_nb = None
+
+
+def _find_method_end(src: str, start_idx: int) -> Optional[int]:
+    """
+    Índice (en caracteres) de la llave que cierra el método.
+    Usa el escáner compilado con numba si está disponible; si no, el de Python puro.
+    """
+    if _scan_braces_php_nb is None:
+        return _scan_braces_php(src, start_idx)
+
+    if src.isascii():
+        # ASCII: offsets de bytes y de caracteres coinciden
+        end = _scan_braces_php_nb(src.encode("ascii"), start_idx)
+        return end if end >= 0 else None
+
+    data = src.encode("utf-8")
+    end = _scan_braces_php_nb(data, len(src[:start_idx].encode("utf-8")))
+    if end < 0:
+        return None
+    return len(data[:end].decode("utf-8"))
+
+
 def extract_method_block(controller_file: Path, method_name: str) -> MethodExtractResult:
-    src = read_text(controller_file)
+    src = read_text_cached(controller_file)
     notes: List[str] = []
 
-    pat = re.compile(rf"\bfunction\s+{re.escape(method_name)}\s*\(", re.IGNORECASE)
+    pat = re.compile(rf"\bfunction\s+(?i:{re.escape(method_name)})\s*\(")
     m = pat.search(src)
     if not m:
         return MethodExtractResult(False, method_name, None, None, None, ["Method signature not found"])
 
     start_sig = m.start()
-    end_brace = _scan_braces_php(src, m.end())
+    end_brace = _find_method_end(src, m.end())
     if end_brace is None:
         return MethodExtractResult(False, method_name, None, None, None, ["Could not match braces for method body"])
 
@@ -142,20 +302,30 @@ def detect_dependencies(method_src: str) -> dict:
       $this->load->model / helper / library
       $this->get() / $this->post() / $this->put() / $this->delete()
     """
-    def findall(p):
-        return sorted(set(re.findall(p, method_src, flags=re.IGNORECASE)))
+    # Una sola pasada para model/helper/library, agrupando por tipo
+    loaded: Dict[str, set] = {"model": set(), "helper": set(), "library": set()}
+    for kind, name in _RX_LOAD_DEPS.findall(method_src):
+        loaded[kind.lower()].add(name)
+
+    # Una sola pasada para $this->get/post/put/delete(
+    verbs = {v.lower() for v in _RX_INPUT_CALLS.findall(method_src)}
 
     return {
-        "models": findall(r"\$this->load->model\(\s*['\"]([^'\"]+)['\"]\s*\)"),
-        "helpers": findall(r"\$this->load->helper\(\s*['\"]([^'\"]+)['\"]\s*\)"),
-        "libraries": findall(r"\$this->load->library\(\s*['\"]([^'\"]+)['\"]\s*\)"),
-        "inputs_get": bool(re.search(r"\$this->get\(", method_src, flags=re.IGNORECASE)),
-        "inputs_post": bool(re.search(r"\$this->post\(", method_src, flags=re.IGNORECASE)),
-        "inputs_put": bool(re.search(r"\$this->put\(", method_src, flags=re.IGNORECASE)),
-        "inputs_delete": bool(re.search(r"\$this->delete\(", method_src, flags=re.IGNORECASE)),
+        "models": sorted(loaded["model"]),
+        "helpers": sorted(loaded["helper"]),
+        "libraries": sorted(loaded["library"]),
+        "inputs_get": "get" in verbs,
+        "inputs_post": "post" in verbs,
+        "inputs_put": "put" in verbs,
+        "inputs_delete": "delete" in verbs,
     }
 
 
+def _dedupe(seq: Iterable[str]) -> List[str]:
+    """Quita duplicados conservando el orden de aparición en el PHP."""
+    return list(dict.fromkeys(seq))
+
+
 def analyze_php_method(method_text: str) -> Dict[str, Any]:
     """
     Heurística: analiza el método PHP extraído para inferir inputs, responses, switch cases y llamadas a modelo.
@@ -163,25 +333,28 @@ def analyze_php_method(method_text: str) -> Dict[str, Any]:
     """
     text = method_text or ""
 
-    def find_inputs(fn_name: str) -> List[str]:
-        return sorted(set(re.findall(rf"\$this->{fn_name}\(\s*['\"]([^'\"]+)['\"]\s*\)", text)))
+    # Una sola pasada para los cuatro verbos de input (dict como set ordenado por aparición)
+    inputs: Dict[str, Dict[str, None]] = {"get": {}, "post": {}, "put": {}, "delete": {}}
+    for verb, name in _RX_INPUTS.findall(text):
+        inputs[verb][name] = None
 
-    inputs_get = find_inputs("get")
-    inputs_post = find_inputs("post")
-    inputs_put = find_inputs("put")
-    inputs_delete = find_inputs("delete")
+    inputs_get = list(inputs["get"])
+    inputs_post = list(inputs["post"])
+    inputs_put = list(inputs["put"])
+    inputs_delete = list(inputs["delete"])
 
-    models = sorted(set(re.findall(r"\$this->load->model\(\s*['\"]([^'\"]+)['\"]\s*\)", text)))
+    models = _dedupe(_RX_MODEL_LOAD.findall(text))
 
-    model_calls = re.findall(r"\$this->([A-Za-z_][A-Za-z0-9_]*)->([A-Za-z_][A-Za-z0-9_]*)\s*\(", text)
-    model_calls_fmt = sorted(set([f"{m}.{fn}" for (m, fn) in model_calls]))
+    model_calls = _RX_MODEL_CALL.findall(text)
+    model_calls_fmt = _dedupe(f"{m}.{fn}" for (m, fn) in model_calls)
 
-    response_codes = sorted(set(re.findall(r"REST_Controller::HTTP_([A-Z_]+)", text)))
-    switch_vars = re.findall(r"switch\s*\(\s*\$([A-Za-z_][A-Za-z0-9_]*)\s*\)", text)
-    cases = re.findall(r"case\s+['\"]?([^'\"]+)['\"]?\s*:", text)
-    has_default = bool(re.search(r"\bdefault\s*:", text))
-    self_consts = sorted(set(re.findall(r"self::([A-Za-z_][A-Za-z0-9_]*)", text)))
-    messages = sorted(set(re.findall(r"'message'\s*=>\s*'([^']+)'", text)))
+    # Los códigos REST se mantienen ordenados
+    response_codes = sorted(set(_RX_REST_CODE.findall(text)))
+    switch_vars = _RX_SWITCH.findall(text)
+    cases = _RX_CASE.findall(text)
+    has_default = bool(_RX_DEFAULT.search(text))
+    self_consts = _dedupe(_RX_SELF_CONST.findall(text))
+    messages = _dedupe(_RX_MESSAGE.findall(text))
 
     return {
         "inputs": {"get": inputs_get, "post": inputs_post, "put": inputs_put, "delete": inputs_delete},
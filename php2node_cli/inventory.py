@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict, Any
 
@@ -8,8 +10,11 @@ from openpyxl import load_workbook
 
 from .utils import norm_endpoint_path, norm_http, norm_version
 
+# Sufijo CodeIgniter REST por método HTTP (Formato B arma Method = <MethodBase>_<sufijo>)
+_HTTP_SUFFIX = {"GET": "get", "POST": "post", "PUT": "put", "DELETE": "delete"}
 
-@dataclass
+
+@dataclass(slots=True)
 class InventoryRow:
     version: str
     controller: str
@@ -18,19 +23,150 @@ class InventoryRow:
     method_base: str
     endpoint_path: str
     endpoint_path_with_version: Optional[str]
-    raw: Dict[str, Any]
+    source_format: str = "FULL"  # FULL | MIN
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        # Se arma bajo demanda (solo lo usa el reporte): no se guarda un dict por fila
+        raw: Dict[str, Any] = {
+            "Version": self.version,
+            "Controller": self.controller,
+            "HttpMethod": self.http_method,
+            "Method": self.method,
+            "MethodBase": self.method_base,
+            "EndpointPath": self.endpoint_path,
+            "EndpointPath with version": self.endpoint_path_with_version,
+            "SourceFormat": self.source_format,
+        }
+        if self.source_format == "MIN":
+            raw["VersionInference"] = "path-prefix or default v1"
+        return raw
+
+
+def _handle_full(cols: Tuple[int, ...], row: Tuple[Any, ...]) -> Optional[InventoryRow]:
+    """Formato A (completo): Version, Controller, HttpMethod, Method, MethodBase, EndpointPath..."""
+    v_i, c_i, hm_i, m_i, mb_i, ep_i, epv_i = cols
+    if row[ep_i] is None:
+        return None
+    version, controller, http_method, method, method_base, endpoint_path = [
+        val.strip() if type(val) is str else val
+        for val in (row[v_i], row[c_i], row[hm_i], row[m_i], row[mb_i], row[ep_i])
+    ]
+    ep_with_ver = row[epv_i] if epv_i >= 0 else None
+    if type(ep_with_ver) is str:
+        ep_with_ver = ep_with_ver.strip()
+
+    if not (version and controller and http_method and method and method_base and endpoint_path):
+        return None
+
+    # Versión, método HTTP, controller y MethodBase se repiten en miles de filas:
+    # internados, cada valor distinto se guarda una sola vez y las comparaciones son por identidad
+    v = sys.intern(norm_version(str(version)))
+    hm = sys.intern(norm_http(str(http_method)))
+    ep = norm_endpoint_path(str(endpoint_path))
+    epv = norm_endpoint_path(str(ep_with_ver)) if ep_with_ver else None
+
+    controller = sys.intern(str(controller).strip())
+    method = str(method).strip()
+    method_base = sys.intern(str(method_base).strip())
+    return InventoryRow(
+        version=v,
+        controller=controller,
+        http_method=hm,
+        method=method,
+        method_base=method_base,
+        endpoint_path=ep,
+        endpoint_path_with_version=epv,
+        source_format="FULL",
+    )
+
+
+def _handle_min(cols: Tuple[int, int], row: Tuple[Any, ...]) -> Optional[InventoryRow]:
+    """Formato B (mínimo): "Método"/"Metodo" + "Path"."""
+    hm_i, path_i = cols
+    hm = row[hm_i]
+    if type(hm) is str:
+        hm = hm.strip()
+    path = row[path_i]
+    if type(path) is str:
+        path = path.strip()
+    if not hm or not path:
+        return None
+
+    hm = sys.intern(norm_http(str(hm)))
+    full_path = norm_endpoint_path(str(path))
+
+    # Infer version if path starts with v1/ or v2/
+    parts = full_path.split("/")
+    if parts and parts[0].lower() in ("v1", "v2"):
+        inferred_version = sys.intern(norm_version(parts[0]))
+        rest = "/".join(parts[1:])
+    else:
+        inferred_version = "v1"
+        rest = full_path
+
+    rest = norm_endpoint_path(rest)
+    rest_parts = rest.split("/")
+    if len(rest_parts) < 2:
+        return None
+
+    controller = sys.intern(rest_parts[0])
+    method_base = sys.intern(rest_parts[1])
+
+    method = f"{method_base}_{_HTTP_SUFFIX[hm]}"
+
+    return InventoryRow(
+        version=inferred_version,
+        controller=controller,
+        http_method=hm,
+        method=method,
+        method_base=method_base,
+        endpoint_path=rest,
+        endpoint_path_with_version=full_path,
+        source_format="MIN",
+    )
 
 
 class Inventory:
     def __init__(self, rows: List[InventoryRow]):
         self.rows = rows
 
+        # Índices para match/infer_version en O(1); conservan el orden original de las filas
+        self._by_hm_ep_v: Dict[Tuple[str, str, str], List[InventoryRow]] = {}
+        self._by_hm_ep: Dict[Tuple[str, str], List[InventoryRow]] = {}
+        self._by_hm_last: Dict[Tuple[str, str], List[InventoryRow]] = {}
+        self._by_hm: Dict[str, List[InventoryRow]] = {}
+        for r in rows:
+            hm, ep = r.http_method, r.endpoint_path
+            self._by_hm_ep_v.setdefault((hm, ep, r.version), []).append(r)
+            self._by_hm_ep.setdefault((hm, ep), []).append(r)
+            self._by_hm_last.setdefault((hm, ep.rsplit("/", 1)[-1]), []).append(r)
+            self._by_hm.setdefault(hm, []).append(r)
+
+        # Versiones únicas y ordenadas por (método, path): infer_version queda en un solo lookup
+        self._versions_by_hm_ep: Dict[Tuple[str, str], Tuple[str, ...]] = {
+            key: tuple(sorted({r.version for r in bucket})) for key, bucket in self._by_hm_ep.items()
+        }
+
     @staticmethod
     def load(xlsx_path: Path, sheet_name: str = "EndPoints") -> "Inventory":
-        wb = load_workbook(filename=str(xlsx_path), data_only=True)
+        # read_only: las filas se leen en streaming, sin cargar el DOM completo del libro
+        wb = load_workbook(filename=str(xlsx_path), data_only=True, read_only=True)
+        try:
+            return Inventory._load_sheet(wb, sheet_name)
+        finally:
+            # read_only mantiene abierto el zip hasta cerrar el libro
+            wb.close()
+
+    @staticmethod
+    def _load_sheet(wb, sheet_name: str) -> "Inventory":
         if sheet_name not in wb.sheetnames:
             raise ValueError(f"Sheet '{sheet_name}' not found. Available: {wb.sheetnames}")
         ws = wb[sheet_name]
+        # En read_only openpyxl confía en el <dimension> del XML, que algunos exportadores
+        # dejan desactualizado y cortaría filas: se ignora y se lee hasta el final del stream.
+        # Cada iter_rows re-parsea el XML, por eso hay un único recorrido de filas por hoja.
+        ws.reset_dimensions()
 
         headers: Dict[str, int] = {}
         header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
@@ -41,15 +177,6 @@ class Inventory:
             if key:
                 headers[key] = idx
 
-        def get(row_vals, col_name: str):
-            idx = headers.get(col_name)
-            if not idx:
-                return None
-            v = row_vals[idx - 1]
-            if isinstance(v, str):
-                v = v.strip()
-            return v
-
         # Formato A (completo): Version, Controller, HttpMethod, Method, MethodBase, EndpointPath...
         required_full = ["Version", "Controller", "HttpMethod", "Method", "MethodBase", "EndpointPath"]
         has_full = all(c in headers for c in required_full)
@@ -65,111 +192,35 @@ class Inventory:
                 f"Expected either {required_full} or {required_min_1}."
             )
 
-        rows: List[InventoryRow] = []
-
-        # ---- Formato A (completo) ----
+        # El handler por fila se elige una sola vez; el loop sobre iter_rows es único
         if has_full:
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if not any(row):
-                    continue
-
-                version = get(row, "Version")
-                controller = get(row, "Controller")
-                http_method = get(row, "HttpMethod")
-                method = get(row, "Method")
-                method_base = get(row, "MethodBase")
-                endpoint_path = get(row, "EndpointPath")
-                ep_with_ver = get(row, "EndpointPath with version")
-
-                if not (version and controller and http_method and method and method_base and endpoint_path):
-                    continue
-
-                v = norm_version(str(version))
-                hm = norm_http(str(http_method))
-                ep = norm_endpoint_path(str(endpoint_path))
-                epv = norm_endpoint_path(str(ep_with_ver)) if ep_with_ver else None
-
-                rows.append(
-                    InventoryRow(
-                        version=v,
-                        controller=str(controller).strip(),
-                        http_method=hm,
-                        method=str(method).strip(),
-                        method_base=str(method_base).strip(),
-                        endpoint_path=ep,
-                        endpoint_path_with_version=epv,
-                        raw={
-                            "Version": v,
-                            "Controller": str(controller).strip(),
-                            "HttpMethod": hm,
-                            "Method": str(method).strip(),
-                            "MethodBase": str(method_base).strip(),
-                            "EndpointPath": ep,
-                            "EndpointPath with version": epv,
-                            "SourceFormat": "FULL",
-                        },
-                    )
-                )
-
-            return Inventory(rows)
-
-        # ---- Formato B (mínimo: Método + Path) ----
-        metodo_col = "Método" if "Método" in headers else "Metodo"
-
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if not any(row):
-                continue
-
-            hm = get(row, metodo_col)
-            path = get(row, "Path")
-            if not hm or not path:
-                continue
+            # Índices (base 0) resueltos una sola vez, fuera del loop
+            cols = (
+                headers["Version"] - 1,
+                headers["Controller"] - 1,
+                headers["HttpMethod"] - 1,
+                headers["Method"] - 1,
+                headers["MethodBase"] - 1,
+                headers["EndpointPath"] - 1,
+                headers.get("EndpointPath with version", 0) - 1,  # -1: columna ausente
+            )
+            handle_row = partial(_handle_full, cols)
+        else:
+            metodo_col = "Método" if "Método" in headers else "Metodo"
+            cols = (headers[metodo_col] - 1, headers["Path"] - 1)
+            handle_row = partial(_handle_min, cols)
 
-            hm = norm_http(str(hm))
-            full_path = norm_endpoint_path(str(path))
-
-            # Infer version if path starts with v1/ or v2/
-            parts = full_path.split("/")
-            if parts and parts[0].lower() in ("v1", "v2"):
-                inferred_version = norm_version(parts[0])
-                rest = "/".join(parts[1:])
-            else:
-                inferred_version = "v1"
-                rest = full_path
-
-            rest = norm_endpoint_path(rest)
-            rest_parts = rest.split("/")
-            if len(rest_parts) < 2:
-                continue
+        # Solo se parsean las columnas hasta la última que se usa
+        max_col = max(cols) + 1
 
-            controller = rest_parts[0]
-            method_base = rest_parts[1]
-
-            suffix = {"GET": "get", "POST": "post", "PUT": "put", "DELETE": "delete"}[hm]
-            method = f"{method_base}_{suffix}"
-
-            rows.append(
-                InventoryRow(
-                    version=inferred_version,
-                    controller=controller,
-                    http_method=hm,
-                    method=method,
-                    method_base=method_base,
-                    endpoint_path=rest,
-                    endpoint_path_with_version=full_path,
-                    raw={
-                        "Version": inferred_version,
-                        "Controller": controller,
-                        "HttpMethod": hm,
-                        "Method": method,
-                        "MethodBase": method_base,
-                        "EndpointPath": rest,
-                        "EndpointPath with version": full_path,
-                        "SourceFormat": "MIN",
-                        "VersionInference": "path-prefix or default v1",
-                    },
-                )
-            )
+        rows: List[InventoryRow] = []
+        rows_append = rows.append
+        # Las filas vacías las descarta cada handler al validar sus columnas obligatorias,
+        # sin recorrer la fila completa con any()
+        for row in ws.iter_rows(min_row=2, max_col=max_col, values_only=True):
+            r = handle_row(row)
+            if r is not None:
+                rows_append(r)
 
         return Inventory(rows)
 
@@ -178,30 +229,26 @@ class Inventory:
         ep = norm_endpoint_path(endpoint_path)
         v = norm_version(version) if version else None
 
-        exact: List[InventoryRow] = []
-        for r in self.rows:
-            if r.http_method != hm:
-                continue
-            if r.endpoint_path != ep:
-                continue
-            if v and r.version != v:
-                continue
-            exact.append(r)
+        if v:
+            exact = list(self._by_hm_ep_v.get((hm, ep, v), ()))
+        else:
+            exact = list(self._by_hm_ep.get((hm, ep), ()))
 
-        suggestions: List[InventoryRow] = []
-        ep_last = ep.split("/")[-1] if ep else ""
-        for r in self.rows:
-            if r.http_method != hm:
-                continue
-            if ep and (ep in r.endpoint_path or r.endpoint_path in ep):
-                suggestions.append(r)
-                continue
-            if ep_last and ep_last == r.endpoint_path.split("/")[-1]:
-                suggestions.append(r)
+        if not ep:
+            return exact, []
+
+        # Coincidencias por último segmento: un hit en el índice precalculado, sin split por fila
+        same_last = {id(r) for r in self._by_hm_last.get((hm, ep.rsplit("/", 1)[-1]), ())}
+        # Solo se recorren las filas del mismo método HTTP; se conserva el orden original
+        suggestions = [
+            r
+            for r in self._by_hm.get(hm, ())
+            if ep in r.endpoint_path or r.endpoint_path in ep or id(r) in same_last
+        ]
 
         return exact, suggestions
 
     def infer_version(self, http_method: str, endpoint_path: str) -> List[str]:
         hm = norm_http(http_method)
         ep = norm_endpoint_path(endpoint_path)
-        return sorted({r.version for r in self.rows if r.http_method == hm and r.endpoint_path == ep})
+        return list(self._versions_by_hm_ep.get((hm, ep), ()))
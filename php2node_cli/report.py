@@ -6,6 +6,41 @@ from typing import Optional, List, Dict, Any, Tuple
 from .utils import write_text
 
 
+_REPORT_MD = """# Endpoint Migration Report
+
+## Input
+- Endpoint: `{endpoint}`
+
+## Inventory Match
+- Version: `{version}`
+- Controller: `{controller}`
+- HttpMethod: `{http_method}`
+- Method: `{method}`
+- MethodBase: `{method_base}`
+- EndpointPath: `{endpoint_path}`
+- EndpointPath with version: `{endpoint_path_with_version}`
+
+## PHP Resolution
+- App: `{app}`
+- Controller file: `{ctrl}`
+- Method extracted: `{method_name}`
+{method_lines}
+## Heuristic Dependencies Detected
+- Models: `{models}`
+- Helpers: `{helpers}`
+- Libraries: `{libraries}`
+- Uses $this->get(): `{inputs_get}`
+- Uses $this->post(): `{inputs_post}`
+- Uses $this->put(): `{inputs_put}`
+- Uses $this->delete(): `{inputs_delete}`
+
+## Risks / Pending Work
+{risks}
+"""
+
+_NO_RISKS = "- None detected by heuristics. Manual review still required."
+
+
 def build_report_md(
     endpoint_original: str,
     inventory_row: Dict[str, Any],
@@ -16,56 +51,34 @@ def build_report_md(
     dependencies: Dict[str, Any],
     risks: List[str],
 ) -> str:
-    ctrl = str(controller_file) if controller_file else "NOT FOUND"
-    app = app_resolved or "N/A"
-
-    lines: List[str] = []
-    lines.append("# Endpoint Migration Report")
-    lines.append("")
-    lines.append("## Input")
-    lines.append(f"- Endpoint: `{endpoint_original}`")
-    lines.append("")
-    lines.append("## Inventory Match")
-    lines.append(f"- Version: `{inventory_row.get('Version')}`")
-    lines.append(f"- Controller: `{inventory_row.get('Controller')}`")
-    lines.append(f"- HttpMethod: `{inventory_row.get('HttpMethod')}`")
-    lines.append(f"- Method: `{inventory_row.get('Method')}`")
-    lines.append(f"- MethodBase: `{inventory_row.get('MethodBase')}`")
-    lines.append(f"- EndpointPath: `{inventory_row.get('EndpointPath')}`")
-    lines.append(f"- EndpointPath with version: `{inventory_row.get('EndpointPath with version')}`")
-    lines.append("")
-    lines.append("## PHP Resolution")
-    lines.append(f"- App: `{app}`")
-    lines.append(f"- Controller file: `{ctrl}`")
-    lines.append(f"- Method extracted: `{method_name}`")
-    if method_lines:
-        lines.append(f"- Method lines: `{method_lines[0]}..{method_lines[1]}`")
-    lines.append("")
-    lines.append("## Heuristic Dependencies Detected")
-    lines.append(f"- Models: `{dependencies.get('models', [])}`")
-    lines.append(f"- Helpers: `{dependencies.get('helpers', [])}`")
-    lines.append(f"- Libraries: `{dependencies.get('libraries', [])}`")
-    lines.append(f"- Uses $this->get(): `{dependencies.get('inputs_get')}`")
-    lines.append(f"- Uses $this->post(): `{dependencies.get('inputs_post')}`")
-    lines.append(f"- Uses $this->put(): `{dependencies.get('inputs_put')}`")
-    lines.append(f"- Uses $this->delete(): `{dependencies.get('inputs_delete')}`")
-    lines.append("")
-    lines.append("## Risks / Pending Work")
-    if risks:
-        for r in risks:
-            lines.append(f"- {r}")
-    else:
-        lines.append("- None detected by heuristics. Manual review still required.")
-    lines.append("")
-    return "\n".join(lines)
+    # Plantilla única formateada una vez; solo las secciones condicionales se arman aparte
+    return _REPORT_MD.format(
+        endpoint=endpoint_original,
+        version=inventory_row.get("Version"),
+        controller=inventory_row.get("Controller"),
+        http_method=inventory_row.get("HttpMethod"),
+        method=inventory_row.get("Method"),
+        method_base=inventory_row.get("MethodBase"),
+        endpoint_path=inventory_row.get("EndpointPath"),
+        endpoint_path_with_version=inventory_row.get("EndpointPath with version"),
+        app=app_resolved or "N/A",
+        ctrl=str(controller_file) if controller_file else "NOT FOUND",
+        method_name=method_name,
+        method_lines=f"- Method lines: `{method_lines[0]}..{method_lines[1]}`\n" if method_lines else "",
+        models=dependencies.get("models", []),
+        helpers=dependencies.get("helpers", []),
+        libraries=dependencies.get("libraries", []),
+        inputs_get=dependencies.get("inputs_get"),
+        inputs_post=dependencies.get("inputs_post"),
+        inputs_put=dependencies.get("inputs_put"),
+        inputs_delete=dependencies.get("inputs_delete"),
+        risks="\n".join(f"- {r}" for r in risks) if risks else _NO_RISKS,
+    )
 
 
 def build_unresolved_md(title: str, details: List[str]) -> str:
-    lines: List[str] = [f"# {title}", ""]
-    for d in details:
-        lines.append(f"- {d}")
-    lines.append("")
-    return "\n".join(lines)
+    body = "".join(f"- {d}\n" for d in details)
+    return f"# {title}\n\n{body}"
 
 
 def write_report(path: Path, content: str) -> None:
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import os
 import re
+import shutil
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Callable, FrozenSet, Iterable, Optional, Set, Tuple, List
 
 from .utils import (
     normalize_controller_filename,
@@ -13,6 +21,170 @@ from .utils import (
 )
 
 
+# Patrón "class <name>" compilado una sola vez por controller. Con nombres ASCII se
+# compila sobre bytes para no decodificar cada .php; los lookarounds tratan los
+# bytes >= 0x80 como parte del identificador, salvo el BOM UTF-8 al inicio del archivo
+# (decodificado es "\ufeff", que no es de palabra: \b en str sí matcheaba después).
+@lru_cache(maxsize=256)
+def _class_pat(name: str) -> "re.Pattern":
+    if name.isascii():
+        return re.compile(
+            rb"(?:(?<=\A\xef\xbb\xbf)|(?<![A-Za-z0-9_\x80-\xff]))class\s+" + re.escape(name.encode("ascii")) + rb"(?![A-Za-z0-9_\x80-\xff])",
+            re.IGNORECASE,
+        )
+    return re.compile(rf"\bclass\s+{re.escape(name)}\b", re.IGNORECASE)
+
+
+# ripgrep (si está en el PATH) se usa como prefiltro del grep de clases
+_RG = shutil.which("rg")
+_RG_TIMEOUT_S = 10
+
+# Misses del grep por (base, controller): repetir una búsqueda fallida sale gratis.
+# En un proceso de larga vida que cambie de repo hay que vaciarlo con _GREP_MISSES.clear().
+_GREP_MISSES: Set[Tuple[str, str]] = set()
+
+
+def _grep_candidates(base: Path, controller: str) -> Iterable[Path]:
+    # rg -F -i devuelve un superconjunto (cualquier .php que mencione el nombre);
+    # el patrón exacto se verifica después en Python. Sin rg, o si falla, rglob.
+    # -a (sin detección de binarios: un NUL no descarta el archivo) y -E none (sin
+    # transcodificar por BOM UTF-16): rg busca en los mismos bytes crudos que la
+    # verificación y que el fallback.
+    if _RG and controller.isascii():
+        cmd = [
+            _RG, "-l", "-a", "-E", "none", "-i", "-F", "--no-messages", "--no-ignore", "--hidden",
+            "--sort", "path", "-g", "*.php", "-e", controller, "--", str(base),
+        ]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, timeout=_RG_TIMEOUT_S)
+        except (OSError, subprocess.TimeoutExpired):
+            proc = None
+        # 0 = hay archivos, 1 = ninguno; 2 = error -> fallback
+        if proc is not None and proc.returncode in (0, 1):
+            return [Path(os.fsdecode(line)) for line in proc.stdout.splitlines() if line]
+    return base.rglob("*.php")
+
+
+# Por debajo de este número de archivos el pool de hilos cuesta más de lo que ahorra
+_PARALLEL_GREP_MIN_FILES = 100
+# Archivos por hilo en cada tanda enviada al pool
+_PARALLEL_GREP_CHUNK_PER_WORKER = 2
+
+
+# Bytes de los .php del grep por (ruta, mtime_ns, tamaño), sin el controller en la llave:
+# resolver N controllers sobre los mismos M archivos cuesta M lecturas. Es propio del
+# resolver (no pisa el cache de utils) y se acota por bytes totales, no por cantidad de
+# archivos: un árbol de candidatos que entra en el presupuesto se lee una sola vez; si no
+# entra, se descartan los menos usados. En un proceso de larga vida que cambie de repo
+# hay que vaciarlo con _php_bytes_clear().
+_PHP_BYTES_BUDGET = 64 * 1024 * 1024
+_php_bytes: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+_php_bytes_size = 0
+_php_bytes_lock = threading.Lock()  # el grep paralelo lee desde varios hilos
+
+
+def _php_bytes_clear() -> None:
+    global _php_bytes_size
+    with _php_bytes_lock:
+        _php_bytes.clear()
+        _php_bytes_size = 0
+
+
+def _read_php_bytes(p: Path) -> bytes:
+    global _php_bytes_size
+    st = p.stat()
+    key = (str(p), st.st_mtime_ns, st.st_size)
+    with _php_bytes_lock:
+        data = _php_bytes.get(key)
+        if data is not None:
+            _php_bytes.move_to_end(key)
+            return data
+    data = p.read_bytes()
+    if len(data) > _PHP_BYTES_BUDGET:
+        return data
+    with _php_bytes_lock:
+        if key not in _php_bytes:
+            _php_bytes[key] = data
+            _php_bytes_size += len(data)
+            while _php_bytes_size > _PHP_BYTES_BUDGET:
+                _, old = _php_bytes.popitem(last=False)
+                _php_bytes_size -= len(old)
+    return data
+
+
+def _grep_one(p: Path, read: Callable, search: Callable) -> bool:
+    try:
+        return search(read(p)) is not None
+    except Exception:
+        return False
+
+
+def _grep_class_file(base: Path, controller: str) -> Optional[Path]:
+    key = (str(base), controller)
+    if key in _GREP_MISSES:
+        return None
+
+    class_pat = _class_pat(controller)
+    search = class_pat.search
+    # Patrón bytes: bytes crudos cacheados; patrón str: se decodifica con read_text
+    read = _read_php_bytes if isinstance(class_pat.pattern, bytes) else read_text
+    files = list(_grep_candidates(base, controller))
+    if len(files) > _PARALLEL_GREP_MIN_FILES:
+        # Lectura + regex en hilos (read y el regex sobre bytes sueltan el GIL en gran parte).
+        # Se envía de a tandas y map conserva el orden: gana el primer archivo en orden de
+        # recorrido, como en serie, y un hit temprano no lee el resto de los candidatos.
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        chunk = workers * _PARALLEL_GREP_CHUNK_PER_WORKER
+        ex = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for i in range(0, len(files), chunk):
+                batch = files[i:i + chunk]
+                for p, hit in zip(batch, ex.map(lambda f: _grep_one(f, read, search), batch)):
+                    if hit:
+                        return p
+        finally:
+            ex.shutdown(wait=True, cancel_futures=True)
+    else:
+        for p in files:
+            if _grep_one(p, read, search):
+                return p
+
+    _GREP_MISSES.add(key)
+    return None
+
+
+# Raíz de controllers por (repo_root, app): se comparte entre las 3 etapas del probe
+# y entre todos los endpoints de una corrida. Depende solo de las rutas, pero si un
+# proceso de larga vida cambia de layout hay que vaciarlo con cache_clear().
+@lru_cache(maxsize=16)
+def _cached_controllers_root(repo_root_str: str, app: str) -> Path:
+    return find_php_controllers_root(Path(repo_root_str) / app)
+
+
+# En Windows/macOS el FS no distingue mayúsculas: un nombre ausente del listado aún
+# puede existir con otra capitalización y se confirma con exists()
+_CASE_SENSITIVE_FS = sys.platform not in ("win32", "darwin")
+
+
+# Nombres presentes en un directorio de controllers (archivos o carpetas, siguiendo
+# symlinks como exists()). Un scandir por directorio alcanza para todos los probes
+# de la corrida en lugar de un stat por candidato y por endpoint; en un proceso de
+# larga vida que cambie de repo hay que vaciarlo con cache_clear().
+@lru_cache(maxsize=64)
+def _dir_names(dir_str: str) -> FrozenSet[str]:
+    try:
+        with os.scandir(dir_str) as it:
+            return frozenset(e.name for e in it if e.is_file() or e.is_dir())
+    except OSError:
+        return frozenset()
+
+
+def _candidate_exists(c: Path) -> bool:
+    if c.name in _dir_names(str(c.parent)):
+        return True
+    return False if _CASE_SENSITIVE_FS else c.exists()
+
+
 @dataclass
 class ResolvedEndpoint:
     controller_file: Optional[Path]
@@ -27,10 +199,10 @@ def probe_controller_file(
     app_choice: str = "auto",
 ) -> Tuple[FileProbeResult, Optional[str]]:
     controller_file = normalize_controller_filename(controller)
+    repo_root_str = str(repo_root)
 
     def candidates_for_app(app_name: str) -> List[Path]:
-        app_root = repo_root / app_name
-        base = find_php_controllers_root(app_root)
+        base = _cached_controllers_root(repo_root_str, app_name)
         return [
             base / version / controller_file,
             base / controller_file,
@@ -43,12 +215,12 @@ def probe_controller_file(
     for app in apps:
         for c in candidates_for_app(app):
             tried.append(str(c))
-            if c.exists():
+            if _candidate_exists(c):
                 return FileProbeResult(True, c, tried), app
 
     # 2) Filename search under controllers
     for app in apps:
-        base = find_php_controllers_root(repo_root / app)
+        base = _cached_controllers_root(repo_root_str, app)
         tried.append(f"{base}/**/{controller_file}")
         if base.exists():
             hits = [p for p in base.rglob(controller_file)]
@@ -56,18 +228,13 @@ def probe_controller_file(
                 return FileProbeResult(True, hits[0], tried), app
 
     # 3) Class-name grep fallback
-    class_pat = re.compile(rf"\bclass\s+{re.escape(controller)}\b", re.IGNORECASE)
     for app in apps:
-        base = find_php_controllers_root(repo_root / app)
+        base = _cached_controllers_root(repo_root_str, app)
         tried.append(f"{base}/**/*.php (grep class {controller})")
         if base.exists():
-            for p in base.rglob("*.php"):
-                try:
-                    txt = read_text(p)
-                except Exception:
-                    continue
-                if class_pat.search(txt):
-                    return FileProbeResult(True, p, tried), app
+            hit = _grep_class_file(base, controller)
+            if hit is not None:
+                return FileProbeResult(True, hit, tried), app
 
     return FileProbeResult(False, None, tried), None
 
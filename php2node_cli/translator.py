@@ -1,8 +1,20 @@
 from __future__ import annotations
 
+import io
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .utils import iter_php_calls
+
+# Patrones precompilados (se reutilizan en cada borrador generado)
+_RX_SWITCH = re.compile(r"switch\s*\(\s*\$([A-Za-z_][A-Za-z0-9_]*)\s*\)\s*{")
+# case y default en una sola alternancia: group(1) es el valor del case, None en default
+_RX_CASE_OR_DEFAULT = re.compile(r"\b(?:case\s+['\"]?([^'\"]+)['\"]?|default)\s*:", re.IGNORECASE)
+# Cabecera "$this->model->fn(" de una llamada a modelo; los args hasta ")\s*;" los toma
+# iter_php_calls por offsets. Sin DOTALL ni ".*?" perezoso: los args pueden ocupar varias
+# líneas pero ningún patrón necesita que "." cruce saltos de línea; conviene no reintroducirlos.
+_RX_MODEL_CALL_HEAD = re.compile(r"\$this->([A-Za-z_][A-Za-z0-9_]*)->([A-Za-z_][A-Za-z0-9_]*)\s*\(")
 
 
 @dataclass
@@ -11,61 +23,71 @@ class TranslationResult:
     notes_md: str
 
 
-def _extract_switch_cases(method_text: str) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+def _extract_switch_cases(method_text: str) -> Tuple[Optional[str], List[Tuple[str, int, int]]]:
     """
-    Busca un switch($var) y extrae cases con el bloque hasta break; o hasta el siguiente case/default.
-    Retorna: (switch_var, [(case_value, case_body_php), ...])
+    Busca un switch($var) y ubica cases con el bloque hasta break; o hasta el siguiente case/default.
+    Retorna: (switch_var, [(case_value, body_start, body_end), ...]) con offsets sobre method_text,
+    sin copiar el cuerpo de cada case.
     """
     text = method_text or ""
-    m = re.search(r"switch\s*\(\s*\$([A-Za-z_][A-Za-z0-9_]*)\s*\)\s*{", text)
+    m = _RX_SWITCH.search(text)
     if not m:
         return None, []
 
     switch_var = m.group(1)
     start = m.end()
 
-    # Captura cases "case '1': .... break;" de forma aproximada
-    cases: List[Tuple[str, str]] = []
-    case_iter = list(re.finditer(r"\bcase\s+['\"]?([^'\"]+)['\"]?\s*:", text[start:], flags=re.IGNORECASE))
-    if not case_iter:
+    # Captura cases "case '1': .... break;" de forma aproximada.
+    # Una sola pasada desde la apertura del switch; los default solo delimitan el último case.
+    cases: List[Tuple[str, int, int]] = []
+    matches = list(_RX_CASE_OR_DEFAULT.finditer(text, start))
+    case_pos = [i for i, mm in enumerate(matches) if mm.group(1) is not None]
+    if not case_pos:
         return switch_var, []
 
-    # offsets relativos al texto[start:]
-    for i, cm in enumerate(case_iter):
+    last = len(case_pos) - 1
+    for n, i in enumerate(case_pos):
+        cm = matches[i]
         case_val = cm.group(1)
-        case_body_start = start + cm.end()
+        case_body_start = cm.end()
 
-        if i + 1 < len(case_iter):
-            case_body_end = start + case_iter[i + 1].start()
+        if n < last:
+            case_body_end = matches[case_pos[n + 1]].start()
+        elif i + 1 < len(matches):
+            # hasta el default que sigue al último case
+            case_body_end = matches[i + 1].start()
         else:
-            # hasta default o fin del switch
-            dm = re.search(r"\bdefault\s*:", text[case_body_start:], flags=re.IGNORECASE)
-            if dm:
-                case_body_end = case_body_start + dm.start()
-            else:
-                # fin del bloque switch: heurística, hasta la siguiente "}"
-                close = text.find("}", case_body_start)
-                case_body_end = close if close != -1 else len(text)
-
-        body = text[case_body_start:case_body_end].strip()
-        cases.append((case_val, body))
+            # fin del bloque switch: heurística, hasta la siguiente "}"
+            close = text.find("}", case_body_start)
+            case_body_end = close if close != -1 else len(text)
+
+        cases.append((case_val, case_body_start, case_body_end))
 
     return switch_var, cases
 
 
-def _find_model_calls_in_block(block_php: str) -> List[str]:
+def _find_model_calls(text: str, start: int = 0, end: Optional[int] = None) -> List[str]:
     """
     $this->bankaccount_model->getlist_customer_bank('COMPLETED');
+    Busca solo en text[start:end] (pos/endpos del regex, sin slice).
     Retorna strings "bankaccount_model.getlist_customer_bank(...)".
     """
-    calls = re.findall(r"\$this->([A-Za-z_][A-Za-z0-9_]*)->([A-Za-z_][A-Za-z0-9_]*)\s*\((.*?)\)\s*;", block_php, flags=re.DOTALL)
     out = []
-    for model, fn, args in calls:
+    for h, args in iter_php_calls(_RX_MODEL_CALL_HEAD, text, start, end):
         args_one_line = " ".join(args.split())
-        out.append(f"{model}.{fn}({args_one_line})")
+        out.append(f"{h.group(1)}.{h.group(2)}({args_one_line})")
     return out
 
 
+def _write_inputs(w: Callable[[str], int], header: str, keys: List[str]) -> None:
+    if not keys:
+        return
+    w(header)
+    for k in keys:
+        w(f"    const {k} = input.{k};\n")
+    w("\n")
+
+
 def build_service_logic_draft(
     *,
     endpoint_path: str,
@@ -82,10 +104,11 @@ def build_service_logic_draft(
       - B: estructura determinística (inputs, switch cases, response codes).
       - A: heurísticas para model calls, default versioning, etc.
     """
-    inputs_get = analysis.get("inputs", {}).get("get", []) or []
-    inputs_post = analysis.get("inputs", {}).get("post", []) or []
-    inputs_put = analysis.get("inputs", {}).get("put", []) or []
-    inputs_delete = analysis.get("inputs", {}).get("delete", []) or []
+    inputs = analysis.get("inputs", {})
+    inputs_get = inputs.get("get", []) or []
+    inputs_post = inputs.get("post", []) or []
+    inputs_put = inputs.get("put", []) or []
+    inputs_delete = inputs.get("delete", []) or []
 
     models_loaded = analysis.get("models_loaded", []) or []
     model_calls = analysis.get("model_calls", []) or []
@@ -102,84 +125,68 @@ def build_service_logic_draft(
     if switch_var and cases:
         notes.append(f"- Switch detected on: ${switch_var} with cases: {[c[0] for c in cases]}")
 
-    # Construcción TS
-    draft: List[str] = []
-    draft.append("/* eslint-disable @typescript-eslint/no-unused-vars */")
-    draft.append("")
-    draft.append("/**")
-    draft.append(" * AUTO-DRAFT (A+B): Estructura basada en patrones del método PHP extraído.")
-    draft.append(" * No es plug-and-play. Requiere intervención humana y capa DB real.")
-    draft.append(" */")
-    draft.append("")
-    draft.append("export type ServiceInput = {")
+    # Construcción TS: se escribe directo al buffer, sin lista intermedia
+    buf = io.StringIO()
+    w = buf.write
+    w("/* eslint-disable @typescript-eslint/no-unused-vars */\n")
+    w("\n")
+    w("/**\n")
+    w(" * AUTO-DRAFT (A+B): Estructura basada en patrones del método PHP extraído.\n")
+    w(" * No es plug-and-play. Requiere intervención humana y capa DB real.\n")
+    w(" */\n")
+    w("\n")
+    w("export type ServiceInput = {\n")
     for k in sorted(set(inputs_get + inputs_post + inputs_put + inputs_delete)):
-        draft.append(f"  {k}?: string;")
-    draft.append("};")
-    draft.append("")
-    draft.append("export type ServiceOutput = unknown;")
-    draft.append("")
-    draft.append(f"export class {service_class_name} " + "{")
-    draft.append(f"  public async {service_method_name}(input: ServiceInput): Promise<ServiceOutput> " + "{")
-    draft.append("    // TODO: validar permisos/autorización equivalente a PHP ($user_permission, etc.)")
-    draft.append("    // TODO: definir capa de datos (repositorio/DAO) para reemplazar modelos CodeIgniter")
-    draft.append("")
+        w(f"  {k}?: string;\n")
+    w("};\n")
+    w("\n")
+    w("export type ServiceOutput = unknown;\n")
+    w("\n")
+    w(f"export class {service_class_name} " + "{\n")
+    w(f"  public async {service_method_name}(input: ServiceInput): Promise<ServiceOutput> " + "{\n")
+    w("    // TODO: validar permisos/autorización equivalente a PHP ($user_permission, etc.)\n")
+    w("    // TODO: definir capa de datos (repositorio/DAO) para reemplazar modelos CodeIgniter\n")
+    w("\n")
 
     # Inputs
-    if inputs_get:
-        draft.append("    // Inputs (PHP $this->get -> Node req.query)")
-        for k in inputs_get:
-            draft.append(f"    const {k} = input.{k};")
-        draft.append("")
-    if inputs_post:
-        draft.append("    // Inputs (PHP $this->post -> Node req.body)")
-        for k in inputs_post:
-            draft.append(f"    const {k} = input.{k};")
-        draft.append("")
-    if inputs_put:
-        draft.append("    // Inputs (PHP $this->put -> Node req.body)")
-        for k in inputs_put:
-            draft.append(f"    const {k} = input.{k};")
-        draft.append("")
-    if inputs_delete:
-        draft.append("    // Inputs (PHP $this->delete -> Node req.query/params según API)")
-        for k in inputs_delete:
-            draft.append(f"    const {k} = input.{k};")
-        draft.append("")
+    _write_inputs(w, "    // Inputs (PHP $this->get -> Node req.query)\n", inputs_get)
+    _write_inputs(w, "    // Inputs (PHP $this->post -> Node req.body)\n", inputs_post)
+    _write_inputs(w, "    // Inputs (PHP $this->put -> Node req.body)\n", inputs_put)
+    _write_inputs(w, "    // Inputs (PHP $this->delete -> Node req.query/params según API)\n", inputs_delete)
 
     # Switch -> Node
     if switch_var and cases:
-        draft.append(f"    // PHP switch (${switch_var}) traducido a estructura Node")
-        draft.append(f"    const {switch_var} = input.{switch_var};")
-        draft.append("    let result: unknown = [];")
-        draft.append("    switch (" + (switch_var) + ") {")
-        for case_val, case_body in cases:
-            draft.append(f"      case '{case_val}': " + "{")
-            calls = _find_model_calls_in_block(case_body)
+        w(f"    // PHP switch (${switch_var}) traducido a estructura Node\n")
+        w(f"    const {switch_var} = input.{switch_var};\n")
+        w("    let result: unknown = [];\n")
+        w("    switch (" + (switch_var) + ") {\n")
+        for case_val, body_start, body_end in cases:
+            w(f"      case '{case_val}': " + "{\n")
+            calls = _find_model_calls(php_method_text, body_start, body_end)
             if calls:
                 for c in calls:
-                    draft.append(f"        // PHP: {c}")
-            draft.append("        // TODO: implementar llamada equivalente (repositorio/DB)")
-            draft.append("        break;")
-            draft.append("      }")
-        draft.append("      default: {")
-        draft.append("        // TODO: default behavior (en PHP puede ser case '0' u otro flujo)")
-        draft.append("        break;")
-        draft.append("      }")
-        draft.append("    }")
-        draft.append("")
-        draft.append("    // TODO: alinear estructura de respuesta con PHP ($this->response)")
-        draft.append("    return { data: result };")
+                    w(f"        // PHP: {c}\n")
+            w("        // TODO: implementar llamada equivalente (repositorio/DB)\n")
+            w("        break;\n")
+            w("      }\n")
+        w("      default: {\n")
+        w("        // TODO: default behavior (en PHP puede ser case '0' u otro flujo)\n")
+        w("        break;\n")
+        w("      }\n")
+        w("    }\n")
+        w("\n")
+        w("    // TODO: alinear estructura de respuesta con PHP ($this->response)\n")
+        w("    return { data: result };\n")
     else:
-        draft.append("    // TODO: no se detectó switch. Implementar lógica basada en el método PHP.")
+        w("    // TODO: no se detectó switch. Implementar lógica basada en el método PHP.\n")
         if model_calls:
-            draft.append("    // Model calls detectadas (referencia):")
+            w("    // Model calls detectadas (referencia):\n")
             for mc in model_calls:
-                draft.append(f"    // - {mc}")
-        draft.append("    return {};")
+                w(f"    // - {mc}\n")
+        w("    return {};\n")
 
-    draft.append("  }")
-    draft.append("}")
-    draft.append("")
+    w("  }\n")
+    w("}\n")
 
     notes_md = "\n".join(["# Translation Notes (A+B)", ""] + notes + [""])
-    return TranslationResult(draft_ts="\n".join(draft), notes_md=notes_md)
+    return TranslationResult(draft_ts=buf.getvalue(), notes_md=notes_md)
@@ -2,14 +2,30 @@ from __future__ import annotations
 
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
-from .utils import read_text, write_text
+from .utils import ASCII_ALNUM, iter_php_calls, read_bytes_cached, read_text_cached, write_text
 
+try:  # orjson es opcional: parsea en C directo desde bytes; si no está se usa json de la stdlib
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
 
-@dataclass
+# Patrones precompilados (se reutilizan en cada endpoint transpilado)
+_RX_SWITCH = re.compile(r"switch\s*\(\s*\$([A-Za-z_][A-Za-z0-9_]*)\s*\)\s*{")
+_RX_CASE = re.compile(r"case\s+['\"]?([^'\"]+)['\"]?\s*:")
+# Cabecera "$var = $this->model->fn(" de una asignación; los args hasta ")\s*;" los toma
+# iter_php_calls por offsets (equivale al antiguo "\((.*?)\)\s*;" con DOTALL, pero lineal)
+_RX_MODEL_ASSIGN_HEAD = re.compile(
+    r"\$([A-Za-z_][A-Za-z0-9_]*)\s*=\s*\$this->([A-Za-z_][A-Za-z0-9_]*)->([A-Za-z_][A-Za-z0-9_]*)\s*\("
+)
+
+
+@dataclass(slots=True, frozen=True)
 class TranspileResult:
     controller_ts: str
     service_ts: str
@@ -17,47 +33,134 @@ class TranspileResult:
     semantic_md: str
 
 
-def _extract_switch_cases(method_php: str) -> Tuple[str | None, List[str]]:
+def _scan_method(method_php: str) -> Tuple[str | None, List[str], List[Dict[str, Any]]]:
     """
-    Very small heuristic:
+    Very small heuristic, one call per method:
       switch ($status) { case '1': ... getlist_customer_bank('COMPLETED'); break; ... }
-    Returns (switch_var, cases)
+      $result = $this->bankaccount_model->getlist_customer_bank('COMPLETED');
+    Returns (switch_var, cases, model_assignments); each assignment is a dict
+      {assigns_to: "result", model: bankaccount_model, fn: getlist_customer_bank, args_raw: "'COMPLETED'"}
     """
-    m = re.search(r"switch\s*\(\s*\$([A-Za-z_][A-Za-z0-9_]*)\s*\)\s*{", method_php)
+    # Tres búsquedas separadas a propósito: cada patrón empieza con un literal
+    # ("switch", "case", "$") que el motor de re usa para saltar texto; una alternancia
+    # única (o con lookaheads para admitir solapamientos) pierde ese atajo y resultó
+    # ~5-9x más lenta en métodos grandes.
+    m = _RX_SWITCH.search(method_php)
     switch_var = m.group(1) if m else None
 
-    cases = re.findall(r"case\s+['\"]?([^'\"]+)['\"]?\s*:", method_php)
-    cases = [c.strip() for c in cases if c.strip()]
-    return switch_var, cases
+    cases = [c for c in (raw.strip() for raw in _RX_CASE.findall(method_php)) if c]
+
+    model_assignments: List[Dict[str, Any]] = [
+        {
+            "assigns_to": h.group(1),
+            "model": h.group(2),
+            "fn": h.group(3),
+            "args_raw": args.strip(),
+        }
+        for h, args in iter_php_calls(_RX_MODEL_ASSIGN_HEAD, method_php)
+    ]
+    return switch_var, cases, model_assignments
+
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    # analysis.json lo escribe la CLI en UTF-8: se parsea desde bytes, sin decodificar antes
+    data = read_bytes_cached(path)
+    if data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
-def _extract_model_call_map(method_php: str) -> List[Dict[str, Any]]:
+# Tope de caracteres al volcar listas del análisis en comentarios y en semantic.md
+_FMT_LIST_MAX = 2000
+
+
+def _fmt_list(xs: List[Any], limit: int = _FMT_LIST_MAX) -> str:
     """
-    Extracts patterns like:
-      $result = $this->bankaccount_model->getlist_customer_bank('COMPLETED');
-    Returns list of dicts:
-      {model: bankaccount_model, fn: getlist_customer_bank, args: ["'COMPLETED'"], assigns_to: "result"}
+    repr(xs) recortado a `limit` caracteres. Los repr de los elementos se arman de a uno
+    y se corta apenas se pasa el tope: un controller con cientos de model calls no
+    arma el repr completo solo para descartarlo.
     """
-    out: List[Dict[str, Any]] = []
-    # capture "$var = $this->model->fn(args);"
-    pat = re.compile(
-        r"\$([A-Za-z_][A-Za-z0-9_]*)\s*=\s*\$this->([A-Za-z_][A-Za-z0-9_]*)->([A-Za-z_][A-Za-z0-9_]*)\s*\((.*?)\)\s*;",
-        re.DOTALL,
-    )
-    for m in pat.finditer(method_php):
-        assigns = m.group(1)
-        model = m.group(2)
-        fn = m.group(3)
-        args_raw = m.group(4).strip()
-        out.append(
-            {
-                "assigns_to": assigns,
-                "model": model,
-                "fn": fn,
-                "args_raw": args_raw,
-            }
-        )
-    return out
+    parts: List[str] = []
+    size = 0  # largo de repr(parts): "[" + ", ".join(parts) + "]"
+    for x in xs:
+        r = repr(x)
+        parts.append(r)
+        size += len(r) + 2
+        if size > limit:
+            return ("[" + ", ".join(parts))[:limit] + "…(truncated)"
+    return "[" + ", ".join(parts) + "]"
+
+
+# Plantillas de codegen especializadas por forma del endpoint y armadas una sola vez al
+# importar: transpile_endpoint elige una con un lookup y solo sustituye los valores.
+_SERVICE_HEAD = """import type {{ {pascal}Input, {pascal}Output }} from "../types/{name_base}.types";
+
+export class {pascal}Service {{
+  public async execute(input: {pascal}Input): Promise<{pascal}Output> {{
+    // TODO: port business logic from PHP
+{php_refs}
+"""
+_SERVICE_TAIL = """
+    // TODO: return payload aligned to PHP response schema
+    return {{ status: true, message: "TODO", data: null, response_code: 200 }};
+  }}
+}}
+"""
+_SERVICE_TPL = {
+    True: _SERVICE_HEAD
+    + """    // PHP switch(${var}) cases: {cases}
+    const {var} = input.{var} ?? "";
+    switch ({var}) {{
+{cases_body}      default: {{
+        // TODO: default behavior (PHP may omit default)
+        break;
+      }}
+    }}
+"""
+    + _SERVICE_TAIL,
+    False: _SERVICE_HEAD + "    // TODO: no switch detected, implement sequential logic\n" + _SERVICE_TAIL,
+}
+_CASE_TPL = """      case "{case}": {{
+        // TODO: map this case to the equivalent model/service call
+        break;
+      }}
+"""
+
+_CONTROLLER_HEAD = """import type {{ Request, Response, NextFunction }} from "express";
+import type {{ {pascal}Input }} from "../types/{name_base}.types";
+import {{ {pascal}Service }} from "../services/{name_base}.service";
+
+export class {pascal}Controller {{
+  private readonly service = new {pascal}Service();
+
+  /**
+   * Route: {http_method} {route_path}
+   * Source: generated from extracted PHP method + analysis.json
+{consts_doc}   */
+  public handler = async (req: Request, res: Response, next: NextFunction) => {{
+    try {{
+      // TODO: add auth/permission checks (PHP likely uses _permiss or similar)
+
+      const input: {pascal}Input = {{
+"""
+_CONTROLLER_TAIL = """      }};
+
+      const result = await this.service.execute(input);
+      const code = typeof result.response_code === "number" ? result.response_code : 200;
+      return res.status(code).json(result);
+    }} catch (err) {{
+      return next(err);
+    }}
+  }};
+}}
+"""
+_CONTROLLER_TPL = {
+    True: _CONTROLLER_HEAD + "{input_map}" + _CONTROLLER_TAIL,
+    False: _CONTROLLER_HEAD + "        // TODO: map body/params\n" + _CONTROLLER_TAIL,
+}
+_GET_INPUT_TPL = '        {k}: typeof req.query.{k} === "string" ? req.query.{k} : undefined,\n'
 
 
 def transpile_endpoint(
@@ -68,27 +171,33 @@ def transpile_endpoint(
     php_method_path: Path,
     analysis_json_path: Path,
 ) -> TranspileResult:
-    php_method = read_text(php_method_path)
-    analysis = json.loads(read_text(analysis_json_path))
+    php_method = read_text_cached(php_method_path)
+    analysis = _load_json(analysis_json_path)
 
+    # Lecturas de analysis desestructuradas una vez; las plantillas usan solo estos locales
     inputs = analysis.get("inputs", {})
+    inputs_get = inputs.get("get", [])
+    inputs_post = inputs.get("post", [])
     models_loaded = analysis.get("models_loaded", [])
     model_calls = analysis.get("model_calls", [])
-    rest_codes = analysis.get("responses", {}).get("rest_codes", [])
-    messages = analysis.get("responses", {}).get("messages", [])
+    responses = analysis.get("responses", {})
+    rest_codes = responses.get("rest_codes", [])
+    messages = responses.get("messages", [])
     self_consts = analysis.get("constants", {}).get("self", [])
 
-    switch_var, switch_cases = _extract_switch_cases(php_method)
-    model_assignments = _extract_model_call_map(php_method)
+    switch_var, switch_cases, model_assignments = _scan_method(php_method)
+
+    pascal = to_pascal(name_base)
 
     # Types
-    input_keys = inputs.get("get", []) if http_method == "GET" else inputs.get("post", [])
-    input_iface = "\n".join([f"  {k}?: string;" for k in input_keys]) or "  // TODO: define input fields"
-    types_ts = f"""export interface {to_pascal(name_base)}Input {{
+    # Claves de entrada resueltas una vez: se reutilizan en types y en el controller
+    input_keys = inputs_get if http_method == "GET" else inputs_post
+    input_iface = "\n".join(f"  {k}?: string;" for k in input_keys) or "  // TODO: define input fields"
+    types_ts = f"""export interface {pascal}Input {{
 {input_iface}
 }}
 
-export interface {to_pascal(name_base)}Output {{
+export interface {pascal}Output {{
   // TODO: define output shape based on PHP response payload
   data?: unknown;
   status?: boolean;
@@ -97,112 +206,66 @@ export interface {to_pascal(name_base)}Output {{
 }}
 """
 
-    # Service
-    service_lines: List[str] = []
-    service_lines.append(f"import type {{ {to_pascal(name_base)}Input, {to_pascal(name_base)}Output }} from \"../types/{name_base}.types\";")
-    service_lines.append("")
-    service_lines.append(f"export class {to_pascal(name_base)}Service {{")
-    service_lines.append(f"  public async execute(input: {to_pascal(name_base)}Input): Promise<{to_pascal(name_base)}Output> {{")
-    service_lines.append("    // TODO: port business logic from PHP")
+    # Service: plantilla elegida por forma (con/sin switch)
+    php_refs = ""
     if models_loaded:
-        service_lines.append(f"    // PHP loads models: {models_loaded}")
+        php_refs += f"    // PHP loads models: {_fmt_list(models_loaded)}\n"
     if model_calls:
-        service_lines.append(f"    // PHP calls (heuristic): {model_calls}")
-    service_lines.append("")
-    if switch_var and switch_cases:
-        service_lines.append(f"    // PHP switch(${switch_var}) cases: {switch_cases}")
-        service_lines.append(f"    const {switch_var} = input.{switch_var} ?? \"\";")
-        service_lines.append("    switch (" + switch_var + ") {")
-        for c in switch_cases:
-            service_lines.append(f"      case \"{c}\": {{")
-            service_lines.append("        // TODO: map this case to the equivalent model/service call")
-            service_lines.append("        break;")
-            service_lines.append("      }")
-        service_lines.append("      default: {")
-        service_lines.append("        // TODO: default behavior (PHP may omit default)")
-        service_lines.append("        break;")
-        service_lines.append("      }")
-        service_lines.append("    }")
-    else:
-        service_lines.append("    // TODO: no switch detected, implement sequential logic")
-    service_lines.append("")
-    service_lines.append("    // TODO: return payload aligned to PHP response schema")
-    service_lines.append("    return { status: true, message: \"TODO\", data: null, response_code: 200 };")
-    service_lines.append("  }")
-    service_lines.append("}")
-    service_ts = "\n".join(service_lines) + "\n"
-
-    # Controller
-    controller_lines: List[str] = []
-    controller_lines.append("import type { Request, Response, NextFunction } from \"express\";")
-    controller_lines.append(f"import type {{ {to_pascal(name_base)}Input }} from \"../types/{name_base}.types\";")
-    controller_lines.append(f"import {{ {to_pascal(name_base)}Service }} from \"../services/{name_base}.service\";")
-    controller_lines.append("")
-    controller_lines.append(f"export class {to_pascal(name_base)}Controller {{")
-    controller_lines.append(f"  private readonly service = new {to_pascal(name_base)}Service();")
-    controller_lines.append("")
-    controller_lines.append("  /**")
-    controller_lines.append(f"   * Route: {http_method} {route_path}")
-    controller_lines.append("   * Source: generated from extracted PHP method + analysis.json")
-    if self_consts:
-        controller_lines.append(f"   * PHP references constants: {self_consts}")
-    controller_lines.append("   */")
-    controller_lines.append("  public handler = async (req: Request, res: Response, next: NextFunction) => {")
-    controller_lines.append("    try {")
-    controller_lines.append("      // TODO: add auth/permission checks (PHP likely uses _permiss or similar)")
-    controller_lines.append("")
-    if http_method == "GET":
-        controller_lines.append("      const input: " + to_pascal(name_base) + "Input = {")
-        for k in inputs.get("get", []):
-            controller_lines.append(f"        {k}: typeof req.query.{k} === \"string\" ? req.query.{k} : undefined,")
-        if not inputs.get("get", []):
-            controller_lines.append("        // TODO: map query params")
-        controller_lines.append("      };")
-    else:
-        controller_lines.append("      const input: " + to_pascal(name_base) + "Input = {")
-        controller_lines.append("        // TODO: map body/params")
-        controller_lines.append("      };")
-    controller_lines.append("")
-    controller_lines.append("      const result = await this.service.execute(input);")
-    controller_lines.append("      const code = typeof result.response_code === \"number\" ? result.response_code : 200;")
-    controller_lines.append("      return res.status(code).json(result);")
-    controller_lines.append("    } catch (err) {")
-    controller_lines.append("      return next(err);")
-    controller_lines.append("    }")
-    controller_lines.append("  };")
-    controller_lines.append("}")
-    controller_ts = "\n".join(controller_lines) + "\n"
+        php_refs += f"    // PHP calls (heuristic): {_fmt_list(model_calls)}\n"
+    has_switch = bool(switch_var and switch_cases)
+    cases_body = "".join(_CASE_TPL.format(case=c) for c in switch_cases) if has_switch else ""
+    service_ts = _SERVICE_TPL[has_switch].format(
+        pascal=pascal,
+        name_base=name_base,
+        php_refs=php_refs,
+        var=switch_var,
+        cases=switch_cases,
+        cases_body=cases_body,
+    )
+
+    # Controller: plantilla elegida por forma (GET mapea query params, el resto body/params)
+    is_get = http_method == "GET"
+    input_map = ""
+    if is_get:
+        input_map = "".join(_GET_INPUT_TPL.format(k=k) for k in input_keys) or "        // TODO: map query params\n"
+    controller_ts = _CONTROLLER_TPL[is_get].format(
+        pascal=pascal,
+        name_base=name_base,
+        http_method=http_method,
+        route_path=route_path,
+        consts_doc=f"   * PHP references constants: {self_consts}\n" if self_consts else "",
+        input_map=input_map,
+    )
 
     # semantic.md
-    semantic_md_lines: List[str] = []
-    semantic_md_lines.append("# Semantic Migration Notes")
-    semantic_md_lines.append("")
-    semantic_md_lines.append("## Endpoint")
-    semantic_md_lines.append(f"- {http_method} `{route_path}`")
-    semantic_md_lines.append("")
-    semantic_md_lines.append("## PHP inputs detected")
-    semantic_md_lines.append(f"- $this->get(): {inputs.get('get', [])}")
-    semantic_md_lines.append(f"- $this->post(): {inputs.get('post', [])}")
-    semantic_md_lines.append("")
-    semantic_md_lines.append("## PHP dependencies")
-    semantic_md_lines.append(f"- Models loaded: {models_loaded}")
-    semantic_md_lines.append(f"- Model calls (coarse): {model_calls}")
-    semantic_md_lines.append(f"- Model assignments (parsed): {model_assignments}")
-    semantic_md_lines.append("")
-    semantic_md_lines.append("## Control flow")
-    semantic_md_lines.append(f"- switch var: {switch_var}")
-    semantic_md_lines.append(f"- cases: {switch_cases}")
-    semantic_md_lines.append("")
-    semantic_md_lines.append("## Responses / codes / messages")
-    semantic_md_lines.append(f"- REST_Controller codes found: {rest_codes}")
-    semantic_md_lines.append(f"- messages found: {messages}")
-    semantic_md_lines.append("")
-    semantic_md_lines.append("## Migration TODOs")
-    semantic_md_lines.append("- Definir capa de datos en Node y reemplazar modelos CI.")
-    semantic_md_lines.append("- Replicar reglas de permisos y auth (ej: _permiss).")
-    semantic_md_lines.append("- Replicar response schema exacto y status codes por rama.")
-    semantic_md_lines.append("")
-    semantic_md = "\n".join(semantic_md_lines) + "\n"
+    semantic_md = f"""# Semantic Migration Notes
+
+## Endpoint
+- {http_method} `{route_path}`
+
+## PHP inputs detected
+- $this->get(): {inputs_get}
+- $this->post(): {inputs_post}
+
+## PHP dependencies
+- Models loaded: {_fmt_list(models_loaded)}
+- Model calls (coarse): {_fmt_list(model_calls)}
+- Model assignments (parsed): {_fmt_list(model_assignments)}
+
+## Control flow
+- switch var: {switch_var}
+- cases: {switch_cases}
+
+## Responses / codes / messages
+- REST_Controller codes found: {rest_codes}
+- messages found: {messages}
+
+## Migration TODOs
+- Definir capa de datos en Node y reemplazar modelos CI.
+- Replicar reglas de permisos y auth (ej: _permiss).
+- Replicar response schema exacto y status codes por rama.
+
+"""
 
     return TranspileResult(
         controller_ts=controller_ts,
@@ -212,7 +275,38 @@ export interface {to_pascal(name_base)}Output {{
     )
 
 
+# Por debajo de este número de endpoints el arranque del pool cuesta más que transpilar
+_PARALLEL_MIN_JOBS = 16
+
+
+def _transpile_one(kw: Dict[str, Any]) -> TranspileResult:
+    # Worker a nivel de módulo para que sea picklable por ProcessPoolExecutor
+    return transpile_endpoint(**kw)
+
+
+def transpile_batch(jobs: Iterable[Dict[str, Any]]) -> List[TranspileResult]:
+    """
+    Transpila varios endpoints; cada job son los kwargs de transpile_endpoint.
+    Los resultados vuelven en el mismo orden que los jobs.
+    """
+    jobs = list(jobs)
+    # Regex + armado de strings por endpoint es CPU puro e independiente: se reparte entre procesos
+    if len(jobs) < _PARALLEL_MIN_JOBS:
+        return [_transpile_one(kw) for kw in jobs]
+    with ProcessPoolExecutor() as ex:
+        return list(ex.map(_transpile_one, jobs, chunksize=8))
+
+
+@lru_cache(maxsize=512)
 def to_pascal(s: str) -> str:
-    parts = re.split(r"[^A-Za-z0-9]+", s)
-    parts = [p for p in parts if p]
-    return "".join(p[:1].upper() + p[1:] for p in parts) or "Endpoint"
+    # Una pasada: primera letra de cada tramo alfanumérico en mayúscula, el resto intacto
+    out: List[str] = []
+    append = out.append
+    at_start = True
+    for ch in s:
+        if ch in ASCII_ALNUM:
+            append(ch.upper() if at_start else ch)
+            at_start = False
+        else:
+            at_start = True
+    return "".join(out) or "Endpoint"
@@ -1,29 +1,67 @@
 from __future__ import annotations
 
-import re
 import hashlib
+import os
+import re
+import string
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Optional, Tuple
+from typing import Iterable, Iterator, Optional, Tuple
 
 
 VALID_HTTP = {"GET", "POST", "PUT", "DELETE"}
+# Lista ordenada para el mensaje de error de norm_http, calculada una sola vez
+_VALID_HTTP_SORTED = sorted(VALID_HTTP)
+
+
+class _SlugTable(dict):
+    # Tabla para str.translate: [a-z0-9] se conserva y todo lo demás pasa a "_".
+    # Los 128 ASCII van precargados; un carácter no ASCII se agrega al verlo por primera vez.
+    def __missing__(self, cp: int) -> int:
+        self[cp] = 95  # "_"
+        return 95
+
+
+_SLUG_TABLE = _SlugTable(
+    (cp, cp if chr(cp) in string.ascii_lowercase or chr(cp) in string.digits else 95) for cp in range(128)
+)
+
+# Caracteres de palabra para camel/pascal y transpiler.to_pascal: solo ASCII, igual que la antigua clase [a-zA-Z0-9]
+ASCII_ALNUM = frozenset(string.ascii_letters + string.digits)
+
+
+# Método ya canónico -> su instancia internada. Es el caso común (inventario, CLI ya
+# normalizada): se resuelve con un lookup, sin strip/upper ni pasar por el lru_cache.
+_HTTP_CANONICAL = {sys.intern(m): sys.intern(m) for m in VALID_HTTP}
 
 
 def norm_http(method: str) -> str:
+    m = _HTTP_CANONICAL.get(method)
+    if m is not None:
+        return m
+    return _norm_http_slow(method)
+
+
+# Los normalizadores y generadores de nombres son funciones puras de un str y se repiten
+# entre endpoints (y varias veces por endpoint): se memorizan con lru_cache.
+@lru_cache(maxsize=512)
+def _norm_http_slow(method: str) -> str:
     m = (method or "").strip().upper()
     if m not in VALID_HTTP:
-        raise ValueError(f"Invalid --http-method '{method}'. Must be one of {sorted(VALID_HTTP)}")
-    return m
+        raise ValueError(f"Invalid --http-method '{method}'. Must be one of {_VALID_HTTP_SORTED}")
+    return _HTTP_CANONICAL[m]
 
 
+@lru_cache(maxsize=512)
 def norm_endpoint_path(p: str) -> str:
-    p = (p or "").strip()
-    p = p.lstrip("/")
-    p = p.rstrip("/")
-    return p
+    # Primero espacios (cualquier whitespace Unicode) y después "/" de ambos lados.
+    # No se junta en un solo strip(" \t.../"): los espacios entre "/" se conservan.
+    return (p or "").strip().strip("/")
 
 
+@lru_cache(maxsize=512)
 def norm_version(v: Optional[str]) -> Optional[str]:
     if v is None:
         return None
@@ -35,56 +73,146 @@ def norm_version(v: Optional[str]) -> Optional[str]:
     return v
 
 
+@lru_cache(maxsize=512)
 def safe_slug(s: str) -> str:
-    s = s.strip().lower()
-    s = re.sub(r"[^a-z0-9]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
-    return s or "item"
+    s = s.strip().lower().translate(_SLUG_TABLE)
+    while "__" in s:
+        s = s.replace("__", "_")
+    return s.strip("_") or "item"
 
 
 def endpoint_key(version: str, http: str, endpoint_path: str) -> str:
     base = f"{version}_{http}_{endpoint_path}"
     slug = safe_slug(base)
-    h = hashlib.sha1(base.encode("utf-8")).hexdigest()[:8]
+    # blake2b de 4 bytes da directamente los 8 hex del sufijo (antes sha1 truncado).
+    # Cambia los nombres de carpeta de out/ respecto de 0.1.x.
+    h = hashlib.blake2b(base.encode("utf-8"), digest_size=4).hexdigest()
     return f"{slug}_{h}"
 
 
+# Directorios ya creados en este proceso: cada endpoint escribe varios archivos en las
+# mismas carpetas y no hace falta repetir el mkdir. Si algo borra una carpeta de out/
+# después de crearla (p. ej. --clean-out), debe hacerlo antes del primer ensure_dir.
+_ensured_dirs: set[Path] = set()
+
+
 def ensure_dir(p: Path) -> None:
+    if p in _ensured_dirs:
+        return
     p.mkdir(parents=True, exist_ok=True)
+    _ensured_dirs.add(p)
 
 
 def write_text(p: Path, text: str) -> None:
     ensure_dir(p.parent)
-    p.write_text(text, encoding="utf-8")
+    # Bytes ya codificados; se conserva la traducción de "\n" del modo texto (CRLF en Windows)
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    p.write_bytes(text.encode("utf-8"))
 
 
 def read_text(path: Path) -> str:
     data = path.read_bytes()
-    for enc in ("utf-8", "utf-8-sig", "cp1252", "latin-1"):
-        try:
-            return data.decode(enc)
-        except UnicodeDecodeError:
-            continue
-    return data.decode("latin-1", errors="replace")
+    # Caso común primero y sin loop: BOM (se descarta) y UTF-8 estricto.
+    # cp1252 cubre los .php guardados en Windows; latin-1 decodifica cualquier byte.
+    if data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    try:
+        return data.decode("cp1252")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
 
 
+# Lecturas memorizadas por (ruta, mtime_ns, tamaño): si el archivo cambia, la llave cambia
+# y se vuelve a leer. Sirven para archivos que se leen varias veces en una misma corrida
+# (el controller de varios endpoints, los .php del grep de clases).
+@lru_cache(maxsize=256)
+def _read_text_keyed(path_str: str, mtime_ns: int, size: int) -> str:
+    return read_text(Path(path_str))
 
-def camel_case(s: str) -> str:
-    s = re.sub(r"[^a-zA-Z0-9]+", " ", s).strip()
-    if not s:
-        return s
-    parts = s.split()
-    out = parts[0].lower() + "".join(w.capitalize() for w in parts[1:])
-    return out
 
+@lru_cache(maxsize=64)
+def _read_bytes_keyed(path_str: str, mtime_ns: int, size: int) -> bytes:
+    return Path(path_str).read_bytes()
 
-def pascal_case(s: str) -> str:
-    s = re.sub(r"[^a-zA-Z0-9]+", " ", s).strip()
-    if not s:
-        return s
-    return "".join(w.capitalize() for w in s.split())
 
+def read_text_cached(path: Path) -> str:
+    st = path.stat()
+    return _read_text_keyed(str(path), st.st_mtime_ns, st.st_size)
 
+
+def read_bytes_cached(path: Path) -> bytes:
+    st = path.stat()
+    return _read_bytes_keyed(str(path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=512)
+def camel_case(s: str) -> str:
+    # Una pasada: cada tramo alfanumérico ASCII es una palabra; la primera va en
+    # minúsculas y las demás capitalizadas (como str.capitalize)
+    out: list[str] = []
+    append = out.append
+    at_start = True
+    for ch in s:
+        if ch in ASCII_ALNUM:
+            append(ch.upper() if at_start and out else ch.lower())
+            at_start = False
+        else:
+            at_start = True
+    return "".join(out)
+
+
+@lru_cache(maxsize=512)
+def pascal_case(s: str) -> str:
+    # Igual que camel_case, pero todas las palabras capitalizadas
+    out: list[str] = []
+    append = out.append
+    at_start = True
+    for ch in s:
+        if ch in ASCII_ALNUM:
+            append(ch.upper() if at_start else ch.lower())
+            at_start = False
+        else:
+            at_start = True
+    return "".join(out)
+
+
+# Cierre de una llamada PHP: ")" seguido de ";" (con espacios o saltos de línea entre medio)
+_RX_CALL_CLOSE = re.compile(r"\)\s*;")
+
+
+def iter_php_calls(
+    head: "re.Pattern[str]", text: str, start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple["re.Match[str]", str]]:
+    """
+    Recorre llamadas "<head>(args);" en text[start:end]; `head` debe terminar en "(".
+    Devuelve (match de la cabecera, args crudos) con args = hasta el primer ")" seguido de ";".
+    Equivale a head + "(.*?)\)\s*;" con DOTALL, pero lineal: el tramo de args se toma por
+    offsets entre la cabecera y el cierre, sin que un ".*?" perezoso recorra el resto del
+    texto por cada cabecera sin cierre.
+    """
+    if end is None:
+        end = len(text)
+    head_search = head.search
+    close_search = _RX_CALL_CLOSE.search
+    pos = start
+    while True:
+        h = head_search(text, pos, end)
+        if h is None:
+            return
+        c = close_search(text, h.end(), end)
+        if c is None:
+            # sin ")...;" después de esta cabecera tampoco lo hay después de las siguientes
+            return
+        yield h, text[h.end():c.start()]
+        pos = c.end()
+
+
+@lru_cache(maxsize=512)
 def normalize_controller_filename(controller: str) -> str:
     c = (controller or "").strip()
     if not c.lower().endswith(".php"):
@@ -0,0 +1,33 @@
+"""
+warmup.py
+=========
+Precalienta la caché de numba del extractor.
+
+Uso (una vez, después de `pip install -e ".[fast]"`):
+    python -m php2node_cli.warmup
+
+Así la primera migración no paga el tiempo de compilación del escáner de llaves.
+"""
+from __future__ import annotations
+
+from . import extractor
+
+
+def main() -> int:
+    if extractor._scan_braces_php_nb is None:
+        print("numba no está instalado: no hay caché que precalentar.")
+        return 0
+
+    # Al importar extractor ya se compiló y guardó la caché; esta llamada verifica que funcione
+    sample = "public function demo_get() { $a = '}'; /* } */ return [1]; }"
+    end = extractor._find_method_end(sample, 0)
+    if end != len(sample) - 1:
+        print("El escáner compilado devolvió un resultado inesperado.")
+        return 1
+
+    print("OK. Caché de numba lista.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())